@@ -1,36 +1,94 @@
+import argparse
+import os
 import torch
-import random
 import numpy as np
-from collections import deque
-import tkinter as tk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from game import SnakeGameAI, Direction, Point
+from game import SnakeGameAI, TkRenderer
 from model import Linear_QNet, QTrainer
-from helper import plot
-import matplotlib
-import matplotlib.colors as mcolors
-matplotlib.use("TkAgg")  # Force Matplotlib to use Tkinter backend
+from replay import ReplayBuffer, PrioritizedReplayBuffer, MemmapReplayBuffer
+from metrics import MetricsStore
+from profiling import Profiler, NULL_PROFILER, PROFILE_EVERY
+from encoders import ENCODERS, make_encoder
+from recorder import EpisodeRecorder
+from vector_env import VectorSnakeEnv
+from checkpoint import save_checkpoint, resume_agent, CHECKPOINT_DIR, CHECKPOINT_EVERY
 from game import BLOCK_SIZE  # Import the constant directly
 MAX_MEMORY = 100_000
 BATCH_SIZE = 1000
 LR = 0.001
+GAMMA = 0.9  # discount rate for future rewards
+HIDDEN_SIZE = 256
+EPSILON_GAMES = 80  # exploration decays linearly to zero over this many games
+PRETRAINED_EPSILON_GAMES = 20  # shorter exploration when starting from pretrained weights
+PER_ALPHA = 0.6  # how strongly prioritized replay follows the TD error (0 = uniform)
+PER_BETA = 0.4  # initial importance-sampling correction, annealed to 1
+VECTOR_ENVS = 16  # boards per step for train_vectorized
+TARGET_SYNC = 1000  # optimizer steps between target network copies when --double is used alone
 
 class Agent:
-    def __init__(self):
+    def __init__(self, prioritized=False, metrics_dir=None, encoder='basic',
+                 target_sync=None, tau=None, double=False, memory_dir=None, compress_after=None, seed=None,
+                 lr=LR, gamma=GAMMA, hidden_size=HIDDEN_SIZE, memory_size=MAX_MEMORY, batch_size=BATCH_SIZE,
+                 epsilon_games=EPSILON_GAMES, pretrained=None):
+        # Constructor options, saved with checkpoints so a resumed run rebuilds the same agent
+        if memory_dir is not None:
+            memory_dir = os.path.abspath(memory_dir)  # so a resume from another cwd finds it
+        self.config = {'prioritized': prioritized, 'encoder': encoder,
+                       'target_sync': target_sync, 'tau': tau, 'double': double,
+                       'memory_dir': memory_dir, 'compress_after': compress_after, 'seed': seed,
+                       'lr': lr, 'gamma': gamma, 'hidden_size': hidden_size, 'memory_size': memory_size,
+                       'batch_size': batch_size, 'epsilon_games': epsilon_games, 'pretrained': pretrained}
+        # Independent streams spawned from one seed: weight init, exploration,
+        # replay sampling and the agent's game(s). seed=None draws fresh entropy;
+        # further streams (e.g. for actor processes) are spawned from seed_seq.
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_seq = seed
+        else:
+            self.seed_seq = np.random.SeedSequence(seed)
+        init_seed, explore_seed, replay_seed, self.env_seed = self.seed_seq.spawn(4)
+        self.rng = np.random.default_rng(explore_seed)
+        # The training game draws its food from this generator (SnakeGameAI takes
+        # it as its seed), so checkpoints can save and restore the food stream
+        self.env_rng = np.random.default_rng(self.env_seed)
+        replay_rng = np.random.default_rng(replay_seed)
         self.n_games = 0
         self.epsilon = 0  # randomness (exploration rate)
-        self.gamma = 0.9  # discount rate for future rewards
-        self.memory = deque(maxlen=MAX_MEMORY)  # stores experiences for replay
-        self.model = Linear_QNet(11, 256, 3) # Neural network for Q-value approximation
-        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma) # Trainer for the model
-        self.action_counts = [0, 0, 0]  # Tracks left, right, straight actions
-        self.q_values = []  # Stores Q-values
-        self.rewards = []  # Stores rewards
+        self.epsilon_games = epsilon_games
+        self.gamma = gamma  # discount rate for future rewards
+        self.batch_size = batch_size
+        self.encoder = make_encoder(encoder)  # game -> observation; its size sizes the network
+        state_size = self.encoder.size
+        self.prioritized = prioritized
+        if memory_dir is not None:
+            if prioritized:
+                raise ValueError("prioritized replay needs the in-memory buffer, drop memory_dir")
+            # Append-only on-disk storage, never overwritten: samples span the whole run
+            self.memory = MemmapReplayBuffer(memory_dir, state_size, rng=replay_rng, state_dtype=self.encoder.dtype,
+                                             compress_after=compress_after)
+        elif prioritized:
+            self.memory = PrioritizedReplayBuffer(memory_size, state_size, alpha=PER_ALPHA, beta=PER_BETA,
+                                                  rng=replay_rng, state_dtype=self.encoder.dtype)
+        else:
+            self.memory = ReplayBuffer(memory_size, state_size, rng=replay_rng,
+                                       state_dtype=self.encoder.dtype)  # stores experiences for replay
+        # Seeded weight init without touching torch's global generator
+        with torch.random.fork_rng():
+            torch.manual_seed(int(init_seed.generate_state(1)[0]))
+            self.model = Linear_QNet(state_size, hidden_size, 3) # Neural network for Q-value approximation
+        if pretrained is not None:
+            # Weights from pretrain.py; the policy is already sensible, so explore less
+            self.model.load_state_dict(torch.load(pretrained, map_location='cpu'))
+            self.epsilon_games = min(epsilon_games, PRETRAINED_EPSILON_GAMES)
+        self._state0 = torch.zeros(state_size)  # reused input buffer for get_action
+        if double and not (target_sync or tau):
+            target_sync = TARGET_SYNC
+        self.trainer = QTrainer(self.model, lr=lr, gamma=self.gamma, target_sync=target_sync, tau=tau,
+                                double=double) # Trainer for the model
+        self.action_counts = [0, 0, 0]  # Moves taken per action, in metrics.ACTIONS order
+        self.metrics = MetricsStore(log_dir=metrics_dir)  # Bounded Q-value/reward/score history
         self.losses = []  # Tracks model loss
         self.heatmap = np.zeros((24, 32))  # Grid to track visited areas 480/20=24 rows, 640/20=32 columns
 
-    def get_state(self, game):
+    def get_state(self, game, out=None):
         head = game.snake[0]
         # Convert pixel position to grid coordinates
         x_idx = min(max(0, int(head.x // BLOCK_SIZE)), self.heatmap.shape[1] - 1)
@@ -41,204 +99,320 @@ class Agent:
         
         self.heatmap[y_idx, x_idx] += 1
 
-        point_l = Point(head.x - 20, head.y)
-        point_r = Point(head.x + 20, head.y)
-        point_u = Point(head.x, head.y - 20)
-        point_d = Point(head.x, head.y + 20)
-        
-        dir_l = game.direction == Direction.LEFT
-        dir_r = game.direction == Direction.RIGHT
-        dir_u = game.direction == Direction.UP
-        dir_d = game.direction == Direction.DOWN
-
-        state = [
-            (dir_r and game.is_collision(point_r)) or 
-            (dir_l and game.is_collision(point_l)) or 
-            (dir_u and game.is_collision(point_u)) or 
-            (dir_d and game.is_collision(point_d)),
-            (dir_u and game.is_collision(point_r)) or 
-            (dir_d and game.is_collision(point_l)) or 
-            (dir_l and game.is_collision(point_u)) or 
-            (dir_r and game.is_collision(point_d)),
-            (dir_d and game.is_collision(point_r)) or 
-            (dir_u and game.is_collision(point_l)) or 
-            (dir_r and game.is_collision(point_u)) or 
-            (dir_l and game.is_collision(point_d)),
-            dir_l, dir_r, dir_u, dir_d,
-            game.food.x < game.head.x,
-            game.food.x > game.head.x,
-            game.food.y < game.head.y,
-            game.food.y > game.head.y
-        ]
-        return np.array(state, dtype=int)
+        # Observation from the configured encoder (by default danger
+        # straight/right/left, direction l/r/u/d, food l/r/u/d), written into
+        # `out` when a preallocated buffer is given
+        return self.encoder.encode(game, out)
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.push(state, action, reward, next_state, done)
 
     def train_long_memory(self):
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)
-        else:
-            mini_sample = self.memory
+        if self.prioritized:
+            states, actions, rewards, next_states, dones, weights, idx = self.memory.sample(self.batch_size)
+            td_errors = self.trainer.train_step(states, actions, rewards, next_states, dones, weights)
+            self.memory.update_priorities(idx, td_errors.numpy())
+            return
 
-        states, actions, rewards, next_states, dones = zip(*mini_sample)
+        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
         self.trainer.train_step(states, actions, rewards, next_states, dones)
 
     def train_short_memory(self, state, action, reward, next_state, done):
         self.trainer.train_step(state, action, reward, next_state, done)
 
     def get_action(self, state):
-        self.epsilon = 80 - self.n_games
+        self.epsilon = self.epsilon_games - self.n_games
         final_move = [0, 0, 0]
-        if random.randint(0, 200) < self.epsilon:
-            move = random.randint(0, 2)
+        if self.rng.integers(0, 201) < self.epsilon:
+            move = int(self.rng.integers(0, 3))
             final_move[move] = 1
         else:
-            state0 = torch.tensor(state, dtype=torch.float)
-            prediction = self.model(state0)
-            move = torch.argmax(prediction).item()
+            # No autograd for action selection, and the input tensor is reused
+            with torch.inference_mode():
+                self._state0.copy_(torch.from_numpy(np.asarray(state, dtype=np.float32)))
+                prediction = self.model(self._state0).numpy()
+            move = int(prediction.argmax())
             final_move[move] = 1
-            self.q_values.append(prediction.tolist())
+            self.metrics.record_q_values(prediction)
         self.action_counts[move] += 1
         return final_move
 
-def train():
-    agent = Agent()
-    game = SnakeGameAI()
-    record = 0
-    # Main Window for Monitoring
+    def get_actions(self, states):
+        # get_action for a batch of boards: one forward pass, per-board
+        # exploration by the same rule; returns action indices
+        self.epsilon = self.epsilon_games - self.n_games
+        with torch.inference_mode():
+            prediction = self.model(torch.from_numpy(np.asarray(states, dtype=np.float32))).numpy()
+        moves = prediction.argmax(axis=1)
+        explore = self.rng.integers(0, 201, size=len(moves)) < self.epsilon
+        moves[explore] = self.rng.integers(0, 3, size=int(explore.sum()))
+        for move, count in enumerate(np.bincount(moves, minlength=3)):
+            self.action_counts[move] += int(count)
+        return moves
+
+def train(agent=None, checkpoint_dir=CHECKPOINT_DIR, checkpoint_every=CHECKPOINT_EVERY, profiler=NULL_PROFILER):
+    # matplotlib is only imported here so --headless and --vector runs stay display-free
+    import tkinter as tk
+    import matplotlib
+    matplotlib.use("TkAgg", force=False)  # Use the Tkinter backend
+    from dashboard import Dashboard, MetricsChannel, make_snapshot
+    agent = agent or Agent()
+    game = SnakeGameAI(seed=agent.env_rng)
+    # Main Window for Monitoring, refreshed on its own timer from published snapshots
     root = tk.Tk()
     root.title("Snake AI Monitoring")
+    channel = MetricsChannel()
+    dashboard = Dashboard(root, channel, profiler=profiler)
 
-    # UI Elements
-    frame = tk.Frame(root)
-    frame.pack()
-    score_label = tk.Label(frame, text="Score: 0", font=("Arial", 14))
-    score_label.pack()
-    epsilon_label = tk.Label(frame, text="Epsilon: 0", font=("Arial", 14))
-    epsilon_label.pack()
-
-    # ✅ Use `plt.Figure()` to avoid extra pop-up figures
-    fig = plt.Figure(figsize=(8, 8))  
-    axs = fig.subplots(2, 2)
-    canvas = FigureCanvasTkAgg(fig, master=root)
-    canvas.get_tk_widget().pack()
-
-    # ✅ Create a dedicated Score Tracking window
-    score_window = tk.Toplevel(root)
-    score_window.title("Score Tracking")
-
-    # ✅ Use `plt.Figure()` for score tracking (prevents extra pop-ups)
-    score_fig = plt.Figure(figsize=(5, 4))  
-    score_ax = score_fig.add_subplot(111)
-    score_canvas = FigureCanvasTkAgg(score_fig, master=score_window)
-    score_canvas.get_tk_widget().pack()
-
-    # ✅ Score tracking variables
-    plot_scores = []
-    plot_mean_scores = []
-    total_score = 0
-
-    def update_visuals():
-        # Clear all axes
-        for ax in axs.flat:
-            ax.clear()
-        
-        # 1. Action Distribution (unchanged)
-        axs[0, 0].bar(['Left', 'Straight', 'Right'], agent.action_counts)
-        axs[0, 0].set_title("Action Distribution")
-        
-        # 2. Q-Values Heatmap (improved)
-        if agent.q_values:
-            q_data = np.array(agent.q_values[-50:])  # Last 50 steps
-            im = axs[0, 1].imshow(q_data.T, aspect='auto', cmap='viridis',
-                                vmin=-1, vmax=1)  # Fixed scale for comparison
-            axs[0, 1].set_title("Q-Values Over Time")
-            axs[0, 1].set_xlabel("Time Step")
-            axs[0, 1].set_yticks([0, 1, 2])
-            axs[0, 1].set_yticklabels(['Left', 'Straight', 'Right'])
-            
-            if not hasattr(update_visuals, 'q_cbar'):
-                update_visuals.q_cbar = fig.colorbar(im, ax=axs[0, 1])
-                update_visuals.q_cbar.set_label("Q-Value")
-        
-        # 3. Rewards (unchanged)
-        axs[1, 0].plot(agent.rewards[-50:])
-        axs[1, 0].set_title("Rewards Over Time")
-        axs[1, 0].set_xlabel("Time Step")
-        
-        # 4. Movement Heatmap (corrected version)
-        heatmap_data = agent.heatmap.copy()
-        
-        # Normalize and handle empty cases
-        if heatmap_data.max() > 0:
-            heatmap_data = heatmap_data / heatmap_data.max()
-        
-        # Create heatmap with proper grid alignment
-        im = axs[1, 1].imshow(heatmap_data, cmap='hot', 
-                            interpolation='nearest',
-                            origin='lower',
-                            aspect='auto',
-                            vmin=0, vmax=1)
-        
-        # Add grid lines at block boundaries
-        axs[1, 1].set_xticks(np.arange(-0.5, 32, 1), minor=True)
-        axs[1, 1].set_yticks(np.arange(-0.5, 24, 1), minor=True)
-        axs[1, 1].grid(which='minor', color='white', linestyle='-', linewidth=0.2)
-        axs[1, 1].set_title("Movement Heatmap")
-        
-        # Manage colorbar
-        if not hasattr(update_visuals, 'heat_cbar'):
-            update_visuals.heat_cbar = fig.colorbar(im, ax=axs[1, 1])
-            update_visuals.heat_cbar.set_label("Visit Frequency")
-        else:
-            im.set_clim(vmin=0, vmax=1)
-            update_visuals.heat_cbar.update_normal(im)
-        
-        canvas.draw()
+    # Two state buffers swapped every step: the next state becomes the
+    # following step's current state instead of being recomputed
+    state_old = agent.get_state(game, out=agent.encoder.empty())
+    state_new = agent.encoder.empty()
 
     def game_loop():
-        nonlocal total_score, record
-        state_old = agent.get_state(game)
-        final_move = agent.get_action(state_old)
-        reward, done, score = game.play_step(final_move)
-
-        state_new = agent.get_state(game)
-        agent.train_short_memory(state_old, final_move, reward, state_new, done)
-        agent.remember(state_old, final_move, reward, state_new, done)
-        agent.rewards.append(reward)
-        score_label.config(text=f"Score: {score}")
-        epsilon_label.config(text=f"Epsilon: {agent.epsilon:.2f}")
+        nonlocal state_old, state_new
+        with profiler.phase('get_action'):
+            final_move = agent.get_action(state_old)
+        # Includes drawing, Tk root.update() and the frame delay
+        with profiler.phase('play_step'):
+            reward, done, score = game.play_step(final_move)
+
+        with profiler.phase('get_state'):
+            agent.get_state(game, out=state_new)
+        with profiler.phase('train_short_memory'):
+            agent.train_short_memory(state_old, final_move, reward, state_new, done)
+        with profiler.phase('remember'):
+            agent.remember(state_old, final_move, reward, state_new, done)
+        agent.metrics.record_step(reward)
+        profiler.step()
 
         if done:
-            game.reset()
             agent.n_games += 1
-            agent.train_long_memory() 
-            if score > record:
-                record = score
+            profiler.count('games')
+            with profiler.phase('train_long_memory'):
+                agent.train_long_memory()
+            if score > agent.metrics.record:
                 agent.model.save()
-            print('Game', agent.n_games, 'Score', score, 'Record:', record)
-            plot_scores.append(score)
-            total_score += score
-            mean_score = total_score / agent.n_games
-            plot_mean_scores.append(mean_score)
-            
-            # Update score plot
-            score_ax.clear()
-            score_ax.plot(plot_scores, label='Scores')
-            score_ax.plot(plot_mean_scores, label='Mean Scores')
-            score_ax.set_title('Score Tracking')
-            score_ax.set_xlabel('Games')
-            score_ax.set_ylabel('Score')
-            score_ax.legend()
-            score_ax.grid(True)
-            score_canvas.draw()
-        update_visuals()
-        root.after(100, game_loop)
+            agent.metrics.record_game(score)
+            print('Game', agent.n_games, 'Score', score, 'Record:', agent.metrics.record)
+            # Checkpoint before the reset draws the next game's first food, so
+            # a resumed run's new game draws the same one
+            if checkpoint_every and agent.n_games % checkpoint_every == 0:
+                with profiler.phase('checkpoint'):
+                    save_checkpoint(agent, checkpoint_dir)
+            game.reset()
+            agent.get_state(game, out=state_new)
+
+        # Only build a snapshot once the dashboard has consumed the previous one
+        if channel.wanted():
+            with profiler.phase('make_snapshot'):
+                channel.publish(make_snapshot(agent, score))
+        state_old, state_new = state_new, state_old
+        root.after(1, game_loop)
 
     game_loop()
+    dashboard.start()
     root.mainloop()
 
 
+def train_headless(agent=None, max_games=None, watch_every=0, checkpoint_dir=CHECKPOINT_DIR,
+                   checkpoint_every=CHECKPOINT_EVERY, record_dir=None, record_min_score=None,
+                   profiler=NULL_PROFILER):
+    # Same training loop as train() without any Tk/matplotlib work, so it runs at
+    # full CPU speed on display-less machines. With watch_every > 0 every n-th game
+    # is drawn in a Tk window. With record_dir, games that set a new record (or
+    # score at least record_min_score) are saved for recorder.py to play back.
+    # A profiling.Profiler times each phase of the loop.
+    agent = agent or Agent()
+    game = SnakeGameAI(headless=True, seed=agent.env_rng)
+    renderer = None
+    recorder = EpisodeRecorder(game, seed=agent.config['seed']) if record_dir else None
+    state_old = agent.get_state(game, out=agent.encoder.empty())
+    state_new = agent.encoder.empty()
+
+    while max_games is None or agent.n_games < max_games:
+        with profiler.phase('get_action'):
+            final_move = agent.get_action(state_old)
+        with profiler.phase('play_step'):
+            reward, done, score = game.play_step(final_move)
+
+        with profiler.phase('get_state'):
+            agent.get_state(game, out=state_new)
+        with profiler.phase('train_short_memory'):
+            agent.train_short_memory(state_old, final_move, reward, state_new, done)
+        with profiler.phase('remember'):
+            agent.remember(state_old, final_move, reward, state_new, done)
+        agent.metrics.record_step(reward)
+        profiler.step()
+        if recorder is not None:
+            recorder.record(final_move)
+
+        if done:
+            if recorder is not None and (score > agent.metrics.record or
+                                         (record_min_score is not None and score >= record_min_score)):
+                recorder.save(os.path.join(record_dir, f'episode_{agent.n_games + 1:06d}_{score}.npz'))
+            agent.n_games += 1
+            profiler.count('games')
+            with profiler.phase('train_long_memory'):
+                agent.train_long_memory()
+            if score > agent.metrics.record:
+                agent.model.save()
+            agent.metrics.record_game(score)
+            print('Game', agent.n_games, 'Score', score, 'Record:', agent.metrics.record,
+                  'Mean:', round(agent.metrics.summary()['recent_mean_score'], 2))
+            # Before the reset, as in train()
+            if checkpoint_every and agent.n_games % checkpoint_every == 0:
+                with profiler.phase('checkpoint'):
+                    save_checkpoint(agent, checkpoint_dir)
+            game.reset()
+            if recorder is not None:
+                recorder.start()
+            agent.get_state(game, out=state_new)
+
+            if watch_every and agent.n_games % watch_every == 0:
+                if renderer is None:
+                    renderer = TkRenderer(game.w, game.h, title="Snake AI (watching)")
+                game.attach_renderer(renderer)
+            elif game.renderer is not None:
+                game.detach_renderer()
+
+        state_old, state_new = state_new, state_old
+
+
+def train_vectorized(agent=None, n_envs=VECTOR_ENVS, max_games=None, checkpoint_dir=CHECKPOINT_DIR,
+                     checkpoint_every=CHECKPOINT_EVERY, profiler=NULL_PROFILER):
+    # train_headless over VectorSnakeEnv: n_envs boards step together, one
+    # forward pass picks every board's action, and each step's n_envs
+    # transitions go into replay with one push_batch and train as one
+    # short-memory batch. The environment computes the basic encoder's 11
+    # features itself. Per-game step/reward metrics mix the boards' steps.
+    agent = agent or Agent()
+    if agent.config['encoder'] != 'basic':
+        raise ValueError("the vectorized environment only provides the 'basic' encoder's features")
+    env = VectorSnakeEnv(n_envs, seed=agent.env_rng)
+    states = env.get_state(out=np.empty((n_envs, agent.encoder.size), dtype=agent.encoder.dtype))
+
+    while max_games is None or agent.n_games < max_games:
+        with profiler.phase('get_action'):
+            actions = agent.get_actions(states)
+        with profiler.phase('play_step'):
+            next_states, rewards, dones, scores = env.step(actions)
+        next_states = next_states.astype(agent.encoder.dtype)
+        # Boards that finished are already reset: their next state is the new
+        # game's first state, which the done flag keeps out of the target
+        with profiler.phase('train_short_memory'):
+            agent.train_short_memory(states, actions, rewards, next_states, dones)
+        with profiler.phase('remember'):
+            agent.memory.push_batch(states, actions, rewards, next_states, dones)
+        for reward in rewards:
+            agent.metrics.record_step(float(reward))
+            profiler.step()
+
+        for score in scores[dones]:
+            agent.n_games += 1
+            profiler.count('games')
+            with profiler.phase('train_long_memory'):
+                agent.train_long_memory()
+            if score > agent.metrics.record:
+                agent.model.save()
+            agent.metrics.record_game(int(score))
+            print('Game', agent.n_games, 'Score', score, 'Record:', agent.metrics.record,
+                  'Mean:', round(agent.metrics.summary()['recent_mean_score'], 2))
+            if checkpoint_every and agent.n_games % checkpoint_every == 0:
+                with profiler.phase('checkpoint'):
+                    save_checkpoint(agent, checkpoint_dir)
+
+        states = next_states
+
+
 if __name__ == '__main__':
-    train()
+    parser = argparse.ArgumentParser(description="Train the Snake DQN agent")
+    parser.add_argument('--headless', action='store_true',
+                        help="train without the Tk game window and monitoring dashboard")
+    parser.add_argument('--games', type=int, default=None,
+                        help="stop after this many games (headless mode only)")
+    parser.add_argument('--watch-every', type=int, default=0,
+                        help="render every n-th game while training headless")
+    parser.add_argument('--vector', type=int, default=0, metavar='N',
+                        help="train headless on N boards stepped together by VectorSnakeEnv (basic encoder)")
+    parser.add_argument('--prioritized', action='store_true',
+                        help="use prioritized experience replay")
+    parser.add_argument('--metrics-dir', default=None,
+                        help="append step and game metrics to chunked .npy files in this directory")
+    parser.add_argument('--encoder', default='basic', choices=sorted(ENCODERS),
+                        help="observation encoder (the network input is sized from it)")
+    parser.add_argument('--memory-dir', default=None,
+                        help="keep every transition in memory-mapped segment files in this directory "
+                             f"instead of the last {MAX_MEMORY} in RAM")
+    parser.add_argument('--compress-after', type=int, default=None,
+                        help="with --memory-dir, compress all but the newest n segments")
+    parser.add_argument('--target-sync', type=int, default=None,
+                        help="bootstrap from a target network copied every n optimizer steps")
+    parser.add_argument('--tau', type=float, default=None,
+                        help="bootstrap from a target network updated by Polyak averaging at this rate")
+    parser.add_argument('--double', action='store_true',
+                        help="Double DQN targets (uses a target network, synced every "
+                             f"{TARGET_SYNC} steps unless --target-sync/--tau is given)")
+    parser.add_argument('--lr', type=float, default=LR)
+    parser.add_argument('--gamma', type=float, default=GAMMA)
+    parser.add_argument('--hidden-size', type=int, default=HIDDEN_SIZE)
+    parser.add_argument('--memory-size', type=int, default=MAX_MEMORY, help="in-memory replay capacity")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--epsilon-games', type=int, default=EPSILON_GAMES,
+                        help="games over which random exploration decays to zero")
+    parser.add_argument('--pretrained', default=None,
+                        help="start from weights written by pretrain.py (explores for "
+                             f"{PRETRAINED_EPSILON_GAMES} games instead of --epsilon-games)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed every random stream (weights, exploration, replay, food) for a reproducible run")
+    parser.add_argument('--record-dir', default=None,
+                        help="save record-setting games for replay with recorder.py (headless mode only)")
+    parser.add_argument('--record-min-score', type=int, default=None,
+                        help="with --record-dir, also save every game scoring at least this much")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR,
+                        help="where periodic checkpoints of the full training state go")
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY,
+                        help="games between checkpoints (0 disables them)")
+    parser.add_argument('--profile', default=None, metavar='PATH',
+                        help="time each phase of the loop and append a JSON-lines snapshot to PATH; "
+                             "SIGUSR1/SIGUSR2 toggle a cProfile/tracemalloc capture")
+    parser.add_argument('--profile-every', type=float, default=PROFILE_EVERY,
+                        help="seconds between profile snapshots")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from the latest checkpoint (its saved agent options win)")
+    args = parser.parse_args()
+
+    # The profiler (and its SIGUSR1/SIGUSR2 handlers) goes in before the agent
+    # is built, so a signal sent during startup does not kill the run
+    profiler = NULL_PROFILER
+    if args.profile:
+        profiler = Profiler(args.profile, every=args.profile_every,
+                            gauges=lambda: {'games': agent.n_games, 'replay_size': len(agent.memory),
+                                            'optimizer_steps': agent.trainer.n_updates})
+    agent = None
+    if args.resume:
+        agent = resume_agent(args.checkpoint_dir, metrics_dir=args.metrics_dir)
+        if agent is None:
+            print('No checkpoint in', args.checkpoint_dir, '- starting from scratch')
+    if agent is None:
+        agent = Agent(prioritized=args.prioritized, metrics_dir=args.metrics_dir, encoder=args.encoder,
+                      target_sync=args.target_sync, tau=args.tau, double=args.double,
+                      memory_dir=args.memory_dir, compress_after=args.compress_after, seed=args.seed,
+                      lr=args.lr, gamma=args.gamma, hidden_size=args.hidden_size, memory_size=args.memory_size,
+                      batch_size=args.batch_size, epsilon_games=args.epsilon_games, pretrained=args.pretrained)
+    try:
+        if args.vector:
+            train_vectorized(agent, n_envs=args.vector, max_games=args.games, checkpoint_dir=args.checkpoint_dir,
+                             checkpoint_every=args.checkpoint_every, profiler=profiler)
+        elif args.headless:
+            train_headless(agent, max_games=args.games, watch_every=args.watch_every,
+                           checkpoint_dir=args.checkpoint_dir, checkpoint_every=args.checkpoint_every,
+                           record_dir=args.record_dir, record_min_score=args.record_min_score, profiler=profiler)
+        else:
+            train(agent, checkpoint_dir=args.checkpoint_dir, checkpoint_every=args.checkpoint_every,
+                  profiler=profiler)
+    finally:
+        profiler.close()
+        agent.metrics.flush()
+        if isinstance(agent.memory, MemmapReplayBuffer):
+            agent.memory.flush()
@@ -0,0 +1,257 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from collections import deque
+import numpy as np
+import torch
+from game import SnakeGameAI, TkRenderer, Point, BLOCK_SIZE, WIDTH, HEIGHT
+from model import Linear_QNet
+from vector_env import VectorSnakeEnv
+from policy import Policy
+from agent_stats import Agent
+import encoders
+from encoders import STATE_SIZE
+
+BOARD_SIZES = [(WIDTH, HEIGHT), (2 * WIDTH, 2 * HEIGHT), (4 * WIDTH, 4 * HEIGHT)]
+SNAKE_LENGTHS = [3, 50, 200, 700]
+BATCH_SIZES = [100, 1000, 5000]
+BENCHMARKS = {}
+
+
+def benchmark(fn):
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+
+def measure(fn, number, repeat):
+    # Best of `repeat` runs of `number` calls, reported per call
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def result(name, seconds, **params):
+    return {'name': name, 'params': params, 'us_per_op': seconds * 1e6, 'ops_per_sec': 1.0 / seconds}
+
+
+def random_actions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    moves = np.eye(3, dtype=int)[rng.integers(0, 3, size=n)]
+    return [list(m) for m in moves]
+
+
+def grow_snake(game, length):
+    # Lay a snake of `length` cells out as a serpentine from the top-left corner
+    # (head last placed), so length-dependent costs can be measured directly
+    cells = []
+    for row in range(game.rows):
+        cols = range(game.cols) if row % 2 == 0 else range(game.cols - 1, -1, -1)
+        cells.extend(Point(col * BLOCK_SIZE, row * BLOCK_SIZE) for col in cols)
+    if length > len(cells):
+        raise ValueError(f"snake of length {length} does not fit on the board")
+    game.reset()
+    for pt in game.snake:
+        game._vacate(pt)
+    game.snake = deque(reversed(cells[:length]))
+    for pt in game.snake:
+        game._occupy(pt)
+    game.head = game.snake[0]
+    game._place_food()
+
+
+@benchmark
+def play_step_headless(number, repeat):
+    for w, h in BOARD_SIZES:
+        game = SnakeGameAI(w, h, headless=True, seed=0)
+        actions = random_actions(number * repeat)
+        it = iter(actions)
+
+        def step():
+            if game.play_step(next(it))[1]:
+                game.reset()
+        yield result('play_step_headless', measure(step, number, repeat), board=[w, h])
+
+
+@benchmark
+def play_step_rendered(number, repeat):
+    try:
+        renderer = TkRenderer()
+    except Exception as e:  # no display available
+        yield {'name': 'play_step_rendered', 'params': {}, 'skipped': str(e)}
+        return
+    game = SnakeGameAI(headless=True, seed=0)
+    game.attach_renderer(renderer)
+    it = iter(random_actions(number * repeat))
+
+    def step():
+        if game.play_step(next(it))[1]:
+            game.reset()
+    yield result('play_step_rendered', measure(step, number, repeat), board=[WIDTH, HEIGHT])
+    renderer.on_close()
+
+
+@benchmark
+def get_state(number, repeat):
+    agent = Agent(seed=0)
+    game = SnakeGameAI(headless=True, seed=0)
+    for length in SNAKE_LENGTHS:
+        grow_snake(game, length)
+        yield result('get_state', measure(lambda: agent.get_state(game), number, repeat), snake_length=length)
+
+
+@benchmark
+def encode_states(number, repeat):
+    # Batched feature extraction into one preallocated (n, 11) buffer
+    for n in [1, 64]:
+        games = [SnakeGameAI(headless=True, seed=i) for i in range(n)]
+        out = np.zeros((n, STATE_SIZE), dtype=int)
+        seconds = measure(lambda: encoders.encode_states(games, out), max(1, number // n), repeat)
+        yield result('encode_states', seconds, boards=n, per_board_us=seconds * 1e6 / n)
+
+
+@benchmark
+def encoder_step(number, repeat):
+    # Per-move cost of each registered encoder on a live game
+    for name in encoders.ENCODERS:
+        encoder = encoders.make_encoder(name)
+        game = SnakeGameAI(headless=True, seed=0)
+        out = encoder.empty()
+        it = iter(random_actions(number * repeat))
+
+        def step():
+            if game.play_step(next(it))[1]:
+                game.reset()
+            encoder.encode(game, out)
+        yield result('encoder_step', measure(step, number, repeat), encoder=name, size=encoder.size)
+
+
+@benchmark
+def remember(number, repeat):
+    agent = Agent(seed=0)
+    state = np.zeros(11, dtype=int)
+    move = [0, 1, 0]
+    yield result('remember', measure(lambda: agent.remember(state, move, 0, state, False), number, repeat))
+
+
+@benchmark
+def train_short_memory(number, repeat):
+    agent = Agent(seed=0)
+    state = np.random.default_rng(0).integers(0, 2, size=11)
+    move = [0, 1, 0]
+    yield result('train_short_memory',
+                 measure(lambda: agent.train_short_memory(state, move, 0, state, False), number, repeat))
+
+
+@benchmark
+def train_long_memory(number, repeat):
+    agent = Agent(seed=0)
+    rng = np.random.default_rng(0)
+    for _ in range(max(BATCH_SIZES) * 2):
+        agent.remember(rng.integers(0, 2, size=11), [0, 1, 0], 0, rng.integers(0, 2, size=11), False)
+    for batch_size in BATCH_SIZES:
+        agent.batch_size = batch_size
+        yield result('train_long_memory', measure(agent.train_long_memory, max(1, number // 100), repeat),
+                     batch_size=batch_size)
+
+
+@benchmark
+def forward(number, repeat):
+    model = Linear_QNet(11, 256, 3)
+    for batch_size in [1] + BATCH_SIZES:
+        x = torch.rand(batch_size, 11)
+        with torch.no_grad():
+            seconds = measure(lambda: model(x), number, repeat)
+        yield result('forward', seconds, batch_size=batch_size, per_sample_us=seconds * 1e6 / batch_size)
+
+
+@benchmark
+def policy_act(number, repeat):
+    # Serving path: greedy action for one board and for a batch of boards
+    model = Linear_QNet(11, 256, 3)
+    states = np.random.default_rng(0).integers(0, 2, size=(1000, 11))
+    for backend in ['numpy', 'torch', 'torchscript']:
+        policy = Policy(model, backend=backend)
+        yield result('policy_act', measure(lambda: policy.act(states[0]), number, repeat), backend=backend)
+        seconds = measure(lambda: policy.act_batch(states), max(1, number // 100), repeat)
+        yield result('policy_act_batch', seconds, backend=backend, boards=len(states),
+                     per_board_us=seconds * 1e6 / len(states))
+
+
+@benchmark
+def get_action(number, repeat):
+    agent = Agent(seed=0)
+    agent.n_games = 1000  # past the exploration phase, always use the network
+    state = np.random.default_rng(0).integers(0, 2, size=11)
+    yield result('get_action', measure(lambda: agent.get_action(state), number, repeat))
+
+
+@benchmark
+def vector_env_step(number, repeat):
+    for n in [1, 64, 1024]:
+        env = VectorSnakeEnv(n, seed=0)
+        actions = env.rng.integers(0, 3, size=n)
+        seconds = measure(lambda: env.step(actions), max(1, number // 10), repeat)
+        yield result('vector_env_step', seconds, boards=n, env_steps_per_sec=n / seconds)
+
+
+@benchmark
+def episodes(number, repeat):
+    # End-to-end headless training episodes (state, action, step, both trainings)
+    n_games = max(1, number // 200)
+    agent = Agent(seed=0)
+    game = SnakeGameAI(headless=True, seed=0)
+    buffers = [agent.get_state(game, out=agent.encoder.empty()), agent.encoder.empty()]
+
+    def episode():
+        state_old, state_new = buffers
+        while True:
+            final_move = agent.get_action(state_old)
+            reward, done, score = game.play_step(final_move)
+            agent.get_state(game, out=state_new)
+            agent.train_short_memory(state_old, final_move, reward, state_new, done)
+            agent.remember(state_old, final_move, reward, state_new, done)
+            if done:
+                game.reset()
+                agent.n_games += 1
+                agent.train_long_memory()
+                agent.get_state(game, out=buffers[0])
+                return
+            state_old, state_new = state_new, state_old
+    yield result('episodes', measure(episode, n_games, repeat))
+
+
+def run(names, number, repeat, out):
+    header = {'name': 'environment', 'python': platform.python_version(), 'numpy': np.__version__,
+              'torch': torch.__version__, 'threads': torch.get_num_threads(), 'machine': platform.machine()}
+    out.write(json.dumps(header) + '\n')
+    for name in names:
+        for row in BENCHMARKS[name](number, repeat):
+            out.write(json.dumps(row) + '\n')
+            out.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the Snake environment, agent and trainer; "
+                                                 "writes one JSON object per line")
+    parser.add_argument('benchmarks', nargs='*',
+                        help="benchmarks to run (default: all): " + ", ".join(BENCHMARKS))
+    parser.add_argument('--number', type=int, default=1000, help="calls per timing run")
+    parser.add_argument('--repeat', type=int, default=3, help="timing runs, the best one is reported")
+    parser.add_argument('--output', default=None, help="write results to this file instead of stdout")
+    args = parser.parse_args()
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmark(s): " + ", ".join(unknown))
+    if args.output:
+        with open(args.output, 'w') as f:
+            run(names, args.number, args.repeat, f)
+    else:
+        run(names, args.number, args.repeat, sys.stdout)
@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import numpy as np
+import torch
+
+CHECKPOINT_DIR = './checkpoints'
+CHECKPOINT_EVERY = 50  # games between checkpoints
+KEEP = 2  # checkpoints kept on disk, older ones are pruned
+LATEST = 'LATEST'
+
+
+def atomic_write(path, text):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def save_checkpoint(agent, directory=CHECKPOINT_DIR, keep=KEEP):
+    # Full training state in its own directory (torch state + replay arrays),
+    # written under a temporary name and renamed into place, then published by
+    # atomically rewriting the LATEST pointer. A crash at any point leaves the
+    # previous checkpoint intact.
+    os.makedirs(directory, exist_ok=True)
+    prefix = f'ckpt-{agent.n_games:08d}'
+    name = prefix
+    final = os.path.join(directory, name)
+    copies = 0
+    while os.path.exists(final):
+        # Same game count saved again (e.g. right after a resume): never touch
+        # the directory LATEST may point to, write a new one next to it
+        copies += 1
+        name = f'{prefix}-{copies}'
+        final = os.path.join(directory, name)
+    tmp = final + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    agent.metrics.flush()
+    trainer = agent.trainer
+    state = {
+        'config': agent.config,
+        'n_games': agent.n_games,
+        'model': agent.model.state_dict(),
+        'optimizer': trainer.optimizer.state_dict(),
+        'target_model': trainer.target_model.state_dict() if trainer.target_model is not None else None,
+        'n_updates': trainer.n_updates,
+        'action_counts': agent.action_counts,
+        'heatmap': agent.heatmap,
+        'metrics': agent.metrics.state_dict(),
+        'epsilon_games': agent.epsilon_games,
+        'agent_rng': agent.rng.bit_generator.state,
+        'env_rng': agent.env_rng.bit_generator.state,
+        'replay_rng': agent.memory.rng.bit_generator.state,
+        'seed_children': agent.seed_seq.n_children_spawned,
+        'torch_rng': torch.get_rng_state(),
+    }
+    torch.save(state, os.path.join(tmp, 'state.pth'))
+    agent.memory.save(tmp)
+
+    os.replace(tmp, final)
+    atomic_write(os.path.join(directory, LATEST), name)
+
+    # Drop copies this one supersedes, then prune older checkpoints
+    checkpoints = sorted(d for d in os.listdir(directory) if d.startswith('ckpt-') and not d.endswith('.tmp'))
+    for old in checkpoints:
+        if old.startswith(prefix) and old != name:
+            shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    checkpoints = [d for d in checkpoints if not d.startswith(prefix) or d == name]
+    for old in checkpoints[:-keep]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return final
+
+
+def latest_checkpoint(directory=CHECKPOINT_DIR):
+    try:
+        with open(os.path.join(directory, LATEST)) as f:
+            path = os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+    return path if os.path.isdir(path) else None
+
+
+def load_checkpoint(agent, path, state=None):
+    if state is None:
+        state = torch.load(os.path.join(path, 'state.pth'), weights_only=False)
+    trainer = agent.trainer
+    agent.n_games = state['n_games']
+    agent.model.load_state_dict(state['model'])
+    trainer.optimizer.load_state_dict(state['optimizer'])
+    if state['target_model'] is not None and trainer.target_model is not None:
+        trainer.target_model.load_state_dict(state['target_model'])
+    trainer.n_updates = state['n_updates']
+    agent.action_counts = list(state['action_counts'])
+    agent.heatmap = np.array(state['heatmap'])
+    agent.metrics.load_state_dict(state['metrics'])
+    # Older checkpoints lack some of these
+    if 'epsilon_games' in state:
+        agent.epsilon_games = state['epsilon_games']
+    if 'agent_rng' in state:
+        agent.rng.bit_generator.state = state['agent_rng']
+    if 'env_rng' in state:
+        agent.env_rng.bit_generator.state = state['env_rng']
+    agent.memory.rng.bit_generator.state = state.get('replay_rng', state.get('numpy_rng'))
+    if 'seed_children' in state:
+        # Streams spawned later (e.g. parallel.py's actors) continue past the
+        # ones the checkpointed run already used instead of repeating them
+        seq = agent.seed_seq
+        agent.seed_seq = np.random.SeedSequence(seq.entropy, spawn_key=seq.spawn_key, pool_size=seq.pool_size,
+                                                n_children_spawned=state['seed_children'])
+    torch.set_rng_state(state['torch_rng'])
+    # Replay arrays are memory-mapped and copied into the preallocated buffer
+    agent.memory.load(path, mmap=True)
+    return agent
+
+
+def resume_agent(directory=CHECKPOINT_DIR, **kwargs):
+    # New agent built from the checkpoint's saved config, then restored;
+    # kwargs (e.g. metrics_dir) are passed through to Agent
+    from agent_stats import Agent
+
+    path = latest_checkpoint(directory)
+    if path is None:
+        return None
+    state = torch.load(os.path.join(path, 'state.pth'), weights_only=False)
+    # The checkpointed model already holds any pretrained weights, so the
+    # pretrained file is not reloaded (it may have moved since)
+    config = state['config']
+    if config['memory_dir'] is not None:
+        # On-disk replay memory: reopen it where it was written (older
+        # checkpoints stored memory_dir relative to that run's cwd)
+        with open(os.path.join(path, 'replay.json')) as f:
+            config = dict(config, memory_dir=json.load(f)['directory'])
+    agent = Agent(**dict(config, pretrained=None), **kwargs)
+    agent.config['pretrained'] = config['pretrained']
+    load_checkpoint(agent, path, state)
+    print('Resumed from', path, 'at game', agent.n_games)
+    return agent
@@ -0,0 +1,167 @@
+import tkinter as tk
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from profiling import NULL_PROFILER
+from metrics import ACTIONS
+
+REFRESH_MS = 500  # dashboard redraw period, independent of the training step rate
+HISTORY = 50  # steps shown in the Q-value and reward panels
+ACTION_LABELS = [action.capitalize() for action in ACTIONS]  # same order as the counts and Q-values
+
+
+class MetricsChannel:
+    # Single-slot hand-off from the training loop to the dashboard. The
+    # producer only builds a snapshot when the consumer has taken the last one,
+    # and both sides just swap references, so no lock is needed (this also
+    # holds when the consumer runs in another thread).
+    def __init__(self):
+        self._snapshot = None
+        self._wanted = True
+
+    def wanted(self):
+        return self._wanted
+
+    def publish(self, snapshot):
+        self._snapshot = snapshot
+        self._wanted = False
+
+    def latest(self):
+        snapshot = self._snapshot
+        self._wanted = True
+        return snapshot
+
+
+def make_snapshot(agent, score):
+    # Small copies of everything the dashboard draws
+    metrics = agent.metrics
+    return {
+        'score': score,
+        'epsilon': agent.epsilon,
+        'action_counts': list(agent.action_counts),
+        'q_values': metrics.q_values.last(HISTORY),
+        'rewards': metrics.rewards.last(HISTORY),
+        'heatmap': agent.heatmap.copy(),
+        'scores': metrics.scores.last(),
+        'mean_scores': metrics.mean_scores.last(),
+    }
+
+
+class Dashboard:
+    # Monitoring windows for train(). Figures and artists are created once and
+    # refresh() only updates their data, on a fixed timer rather than per step.
+    def __init__(self, root, channel, refresh_ms=REFRESH_MS, profiler=NULL_PROFILER):
+        self.root = root
+        self.channel = channel
+        self.refresh_ms = refresh_ms
+        self.profiler = profiler
+
+        # UI Elements
+        frame = tk.Frame(root)
+        frame.pack()
+        self.score_label = tk.Label(frame, text="Score: 0", font=("Arial", 14))
+        self.score_label.pack()
+        self.epsilon_label = tk.Label(frame, text="Epsilon: 0", font=("Arial", 14))
+        self.epsilon_label.pack()
+
+        # ✅ Use `plt.Figure()` to avoid extra pop-up figures
+        self.fig = plt.Figure(figsize=(8, 8))
+        self.canvas = FigureCanvasTkAgg(self.fig, master=root)
+        self.canvas.get_tk_widget().pack()
+
+        # ✅ Create a dedicated Score Tracking window
+        score_window = tk.Toplevel(root)
+        score_window.title("Score Tracking")
+        self.score_fig = plt.Figure(figsize=(5, 4))
+        self.score_canvas = FigureCanvasTkAgg(self.score_fig, master=score_window)
+        self.score_canvas.get_tk_widget().pack()
+
+        self._build_artists()
+
+    def _build_artists(self):
+        axs = self.fig.subplots(2, 2)
+        self.axs = axs
+
+        # 1. Action Distribution
+        self.action_bars = axs[0, 0].bar(ACTION_LABELS, [0, 0, 0])
+        axs[0, 0].set_title("Action Distribution")
+
+        # 2. Q-Values Heatmap (last HISTORY steps, fixed scale for comparison)
+        self.q_image = axs[0, 1].imshow(np.full((3, HISTORY), np.nan), aspect='auto', cmap='viridis',
+                                        vmin=-1, vmax=1)
+        axs[0, 1].set_title("Q-Values Over Time")
+        axs[0, 1].set_xlabel("Time Step")
+        axs[0, 1].set_yticks([0, 1, 2])
+        axs[0, 1].set_yticklabels(ACTION_LABELS)
+        self.fig.colorbar(self.q_image, ax=axs[0, 1]).set_label("Q-Value")
+
+        # 3. Rewards
+        self.reward_line, = axs[1, 0].plot([], [])
+        axs[1, 0].set_title("Rewards Over Time")
+        axs[1, 0].set_xlabel("Time Step")
+
+        # 4. Movement Heatmap (normalized visit counts)
+        self.heat_image = axs[1, 1].imshow(np.zeros((24, 32)), cmap='hot',
+                                           interpolation='nearest',
+                                           origin='lower',
+                                           aspect='auto',
+                                           vmin=0, vmax=1)
+        axs[1, 1].set_xticks(np.arange(-0.5, 32, 1), minor=True)
+        axs[1, 1].set_yticks(np.arange(-0.5, 24, 1), minor=True)
+        axs[1, 1].grid(which='minor', color='white', linestyle='-', linewidth=0.2)
+        axs[1, 1].set_title("Movement Heatmap")
+        self.fig.colorbar(self.heat_image, ax=axs[1, 1]).set_label("Visit Frequency")
+
+        # Score Tracking
+        self.score_ax = self.score_fig.add_subplot(111)
+        self.score_line, = self.score_ax.plot([], [], label='Scores')
+        self.mean_score_line, = self.score_ax.plot([], [], label='Mean Scores')
+        self.score_ax.set_title('Score Tracking')
+        self.score_ax.set_xlabel('Games')
+        self.score_ax.set_ylabel('Score')
+        self.score_ax.legend()
+        self.score_ax.grid(True)
+
+    def start(self):
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.channel.latest()
+        if snapshot is not None:
+            # draw_idle() renders later, in Tk's idle time (untimed in the profile)
+            with self.profiler.phase('update_visuals'):
+                self.score_label.config(text=f"Score: {snapshot['score']}")
+                self.epsilon_label.config(text=f"Epsilon: {snapshot['epsilon']:.2f}")
+                self.update_artists(snapshot)
+                self.canvas.draw_idle()
+                self.score_canvas.draw_idle()
+        self.root.after(self.refresh_ms, self.refresh)
+
+    def update_artists(self, snapshot):
+        counts = snapshot['action_counts']
+        for bar, count in zip(self.action_bars, counts):
+            bar.set_height(count)
+        self.axs[0, 0].set_ylim(0, max(max(counts), 1) * 1.1)
+
+        # Pad with NaN so the image keeps its shape while history fills up
+        q_data = np.full((HISTORY, 3), np.nan)
+        q_values = snapshot['q_values']
+        if len(q_values):
+            q_data[-len(q_values):] = q_values
+        self.q_image.set_data(q_data.T)
+
+        rewards = snapshot['rewards']
+        self.reward_line.set_data(np.arange(len(rewards)), rewards)
+        self.axs[1, 0].relim()
+        self.axs[1, 0].autoscale_view()
+
+        heatmap = snapshot['heatmap']
+        if heatmap.max() > 0:
+            heatmap = heatmap / heatmap.max()
+        self.heat_image.set_data(heatmap)
+
+        scores = snapshot['scores']
+        self.score_line.set_data(np.arange(len(scores)), scores)
+        self.mean_score_line.set_data(np.arange(len(scores)), snapshot['mean_scores'])
+        self.score_ax.relim()
+        self.score_ax.autoscale_view()
@@ -0,0 +1,251 @@
+import numpy as np
+from game import Direction, BLOCK_SIZE, WIDTH, HEIGHT
+
+STATE_SIZE = 11
+
+# Directions in clockwise order, as in SnakeGameAI._move, with their cell offsets
+CLOCKWISE = [Direction.RIGHT, Direction.DOWN, Direction.LEFT, Direction.UP]
+DIR_INDEX = {d: i for i, d in enumerate(CLOCKWISE)}
+OFFSETS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+# Turns for the danger features: straight, right, left
+TURNS = (0, 1, 3)
+# Neighbour offsets for [straight, right, left] per direction index
+DANGER_OFFSETS = [[OFFSETS[(d + t) % 4] for t in TURNS] for d in range(4)]
+# dir_l, dir_r, dir_u, dir_d per direction index
+DIR_FEATURES = [[d == Direction.LEFT, d == Direction.RIGHT, d == Direction.UP, d == Direction.DOWN]
+                for d in CLOCKWISE]
+# (dx, dy, key bit) of the [straight, right, left] danger cells per direction index
+DANGER_BITS = [[(dx, dy, bit) for (dx, dy), bit in zip(DANGER_OFFSETS[d], (64, 32, 16))] for d in range(4)]
+# Every possible 11-feature vector, indexed by direction * 128 + danger bits * 16
+# + food bits (food left, right, up, down), so encoding is one row copy
+STATE_TABLE = np.array([[(key >> 6) & 1, (key >> 5) & 1, (key >> 4) & 1] + DIR_FEATURES[key >> 7] +
+                        [(key >> 3) & 1, (key >> 2) & 1, (key >> 1) & 1, key & 1]
+                        for key in range(4 * 128)], dtype=np.uint8)
+
+
+def encode_state(game, out=None):
+    # The 11 features of Agent.get_state read straight off the game's occupancy
+    # grid (no Point objects, no is_collision calls): they are packed into a
+    # STATE_TABLE key and the matching row is copied into `out`
+    if out is None:
+        out = np.zeros(STATE_SIZE, dtype=int)
+    d = DIR_INDEX[game.direction]
+    head = game.head
+    px = head.x
+    py = head.y
+    hx = int(px // BLOCK_SIZE)
+    hy = int(py // BLOCK_SIZE)
+    cols = game.cols
+    rows = game.rows
+    grid = game.grid
+
+    key = d << 7
+    for dx, dy, bit in DANGER_BITS[d]:
+        x = hx + dx
+        y = hy + dy
+        if x < 0 or x >= cols or y < 0 or y >= rows or grid[y * cols + x]:
+            key |= bit
+    food = game.food
+    if food.x < px:
+        key |= 8
+    elif food.x > px:
+        key |= 4
+    if food.y < py:
+        key |= 2
+    elif food.y > py:
+        key |= 1
+    out[:] = STATE_TABLE[key]
+    return out
+
+
+def encode_states(games, out=None):
+    # Batch of boards into one (n, 11) array, e.g. for a single batched forward pass
+    if out is None:
+        out = np.zeros((len(games), STATE_SIZE), dtype=int)
+    for i, game in enumerate(games):
+        encode_state(game, out[i])
+    return out
+
+
+# Registry of observation encoders: name -> class taking the board size in pixels.
+# Every encoder declares `shape` (and so `size`, the Linear_QNet input width)
+# and `dtype`, and encodes one game per call into an optional flat buffer.
+ENCODERS = {}
+
+
+def register_encoder(name):
+    def wrap(cls):
+        cls.name = name
+        ENCODERS[name] = cls
+        return cls
+    return wrap
+
+
+def make_encoder(name, w=WIDTH, h=HEIGHT):
+    if name not in ENCODERS:
+        raise ValueError(f"unknown encoder {name!r}, choose from {sorted(ENCODERS)}")
+    return ENCODERS[name](w, h)
+
+
+class Encoder:
+    shape = (STATE_SIZE,)
+    dtype = np.uint8
+
+    def __init__(self, w=WIDTH, h=HEIGHT):
+        self.cols = int(w // BLOCK_SIZE)
+        self.rows = int(h // BLOCK_SIZE)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def empty(self):
+        return np.zeros(self.size, dtype=self.dtype)
+
+    def encode(self, game, out=None):
+        raise NotImplementedError
+
+
+@register_encoder('basic')
+class BasicEncoder(Encoder):
+    # The original 11 boolean features (danger one cell ahead, heading, food side)
+    def encode(self, game, out=None):
+        return encode_state(game, out)
+
+
+@register_encoder('grid')
+class GridEncoder(Encoder):
+    # Body/head/food channels over the whole board, flattened for Linear_QNet.
+    # The tensor is kept between calls and only the cells touched by the last
+    # move are updated (new head, old head, vacated tail, food); a new game or a
+    # skipped step triggers a full rebuild.
+    BODY, HEAD, FOOD = 0, 1, 2
+
+    def __init__(self, w=WIDTH, h=HEIGHT):
+        super().__init__(w, h)
+        self.shape = (3, self.rows, self.cols)
+        self.tensor = np.zeros(self.shape, dtype=np.uint8)
+        self._snake = None
+        self._frame = None
+
+    def _xy(self, pt):
+        return int(pt.y // BLOCK_SIZE), int(pt.x // BLOCK_SIZE)
+
+    def _inside(self, pt):
+        y, x = self._xy(pt)
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def _rebuild(self, game):
+        self.tensor[:] = 0
+        body = self.tensor[self.BODY].reshape(-1)
+        body[:] = np.frombuffer(game.grid, dtype=np.uint8) > 0
+        if self._inside(game.head):
+            self.tensor[(self.HEAD,) + self._xy(game.head)] = 1
+        self.tensor[(self.FOOD,) + self._xy(game.food)] = 1
+
+    def _update(self, game):
+        # Old head is now plain body
+        if self._inside(self._head):
+            self.tensor[(self.HEAD,) + self._xy(self._head)] = 0
+        if self._inside(game.head):
+            y, x = self._xy(game.head)
+            self.tensor[self.BODY, y, x] = 1
+            self.tensor[self.HEAD, y, x] = 1
+        # Tail moved on: clear its old cell unless something still occupies it
+        if game.snake[-1] != self._tail:
+            y, x = self._xy(self._tail)
+            self.tensor[self.BODY, y, x] = game.grid[y * self.cols + x] > 0
+        if game.food != self._food:
+            self.tensor[(self.FOOD,) + self._xy(self._food)] = 0
+            self.tensor[(self.FOOD,) + self._xy(game.food)] = 1
+
+    def encode(self, game, out=None):
+        same_game = game.snake is self._snake
+        if same_game and game.frame_iteration == self._frame + 1:
+            self._update(game)
+        elif not (same_game and game.frame_iteration == self._frame):
+            self._rebuild(game)
+        self._snake = game.snake
+        self._frame = game.frame_iteration
+        self._head = game.head
+        self._tail = game.snake[-1]
+        self._food = game.food
+
+        if out is None:
+            out = self.empty()
+        out[:] = self.tensor.reshape(-1)
+        return out
+
+
+# 8 ray directions relative to the heading, clockwise from straight ahead,
+# in cell offsets for a snake heading right (rotated per heading below)
+RAYS = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]
+
+
+def _rotate(dx, dy, d):
+    # Rotate a right-heading offset clockwise by d quarter turns
+    for _ in range(d):
+        dx, dy = -dy, dx
+    return dx, dy
+
+
+RAY_OFFSETS = [[_rotate(dx, dy, d) for dx, dy in RAYS] for d in range(4)]
+
+
+@register_encoder('rays')
+class RayEncoder(Encoder):
+    # For each of 8 rays relative to the heading: 1/distance to the wall, to
+    # the first body cell (0 if none) and to the food (0 if not on the ray).
+    # Wall and food distances are arithmetic; the body walk stops at the first
+    # occupied cell, so cost is bounded by the free space around the head
+    # rather than rebuilt from the whole board.
+    dtype = np.float32
+
+    def __init__(self, w=WIDTH, h=HEIGHT):
+        super().__init__(w, h)
+        self.shape = (len(RAYS) * 3,)
+
+    def _wall_distance(self, x, y, dx, dy):
+        steps = []
+        if dx:
+            steps.append(self.cols - x if dx > 0 else x + 1)
+        if dy:
+            steps.append(self.rows - y if dy > 0 else y + 1)
+        return min(steps)
+
+    def encode(self, game, out=None):
+        if out is None:
+            out = self.empty()
+        hx = int(game.head.x // BLOCK_SIZE)
+        hy = int(game.head.y // BLOCK_SIZE)
+        fx = int(game.food.x // BLOCK_SIZE)
+        fy = int(game.food.y // BLOCK_SIZE)
+        grid = game.grid
+        cols = self.cols
+        inside = 0 <= hx < cols and 0 <= hy < self.rows
+
+        features = []
+        for dx, dy in RAY_OFFSETS[DIR_INDEX[game.direction]]:
+            if not inside:
+                features += (1.0, 0.0, 0.0)
+                continue
+            wall = self._wall_distance(hx, hy, dx, dy)
+
+            body = 0.0
+            x, y = hx, hy
+            for step in range(1, wall):
+                x += dx
+                y += dy
+                if grid[y * cols + x]:
+                    body = 1.0 / step
+                    break
+
+            food = 0.0
+            ox, oy = fx - hx, fy - hy
+            n = max(abs(ox), abs(oy))
+            if 0 < n < wall and ox == dx * n and oy == dy * n:
+                food = 1.0 / n
+
+            features += (1.0 / wall, body, food)
+        out[:] = features
+        return out
@@ -0,0 +1,277 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+from multiprocessing import Pool, shared_memory
+import numpy as np
+import torch
+from game import SnakeGameAI
+from model import Linear_QNet
+from policy import Policy
+from encoders import ENCODERS, make_encoder
+from checkpoint import atomic_write, LATEST
+
+EVOLUTION_DIR = './evolution'
+POPULATION = 64
+EPISODES = 5  # headless games per candidate, the same seeds for the whole generation
+HIDDEN_SIZE = 32  # small genomes evolve faster than the DQN's 256-unit layer
+ELITE = 2  # best candidates copied unchanged into the next generation
+TOURNAMENT_SIZE = 3
+CROSSOVER_RATE = 0.25  # fraction of children bred by crossover, the rest are mutated copies of one parent.
+                       # Unrelated networks order their hidden units differently, so mixing them is
+                       # mostly destructive; at 1.0 the population barely improved.
+TRUNCATION = 0.25  # fraction of the population truncation selection breeds from
+MUTATION_RATE = 0.1  # probability that a weight is mutated
+MUTATION_SIGMA = 0.1  # std of the Gaussian noise added to a mutated weight
+SURVIVAL_BONUS = 0.001  # fitness per move survived, so early generations that never eat still rank
+KEEP = 2  # generation checkpoints kept on disk
+
+SELECTIONS = ['tournament', 'truncation', 'roulette']
+CROSSOVERS = ['uniform', 'one_point', 'blend', 'none']
+
+# Per-worker state set up once by _init_worker: the population array is a
+# view into the parent's shared memory block, so tasks only carry indices
+_worker = {}
+
+
+def n_params(input_size, hidden_size, output_size=3):
+    return hidden_size * input_size + hidden_size + output_size * hidden_size + output_size
+
+
+def model_vector(model):
+    # Linear_QNet parameters as one flat float32 genome
+    return torch.nn.utils.parameters_to_vector(model.parameters()).detach().numpy().astype(np.float32)
+
+
+def vector_model(vector, input_size, hidden_size, output_size=3):
+    model = Linear_QNet(input_size, hidden_size, output_size)
+    torch.nn.utils.vector_to_parameters(torch.from_numpy(np.array(vector, dtype=np.float32)), model.parameters())
+    return model
+
+
+def _init_worker(shm_name, shape, encoder_name, hidden_size):
+    torch.set_num_threads(1)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    encoder = make_encoder(encoder_name)
+    _worker['shm'] = shm
+    _worker['population'] = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    _worker['encoder'] = encoder
+    _worker['policy'] = Policy(Linear_QNet(encoder.size, hidden_size, 3))
+
+
+def _evaluate(task):
+    # Play one candidate's episodes; returns (index, fitness, mean score)
+    index, seeds = task
+    policy = _worker['policy']
+    encoder = _worker['encoder']
+    policy.load_vector(_worker['population'][index])
+    state = encoder.empty()
+    moves = np.eye(3, dtype=int).tolist()
+    scores, steps = [], 0
+    for seed in seeds:
+        game = SnakeGameAI(headless=True, seed=seed)
+        while True:
+            encoder.encode(game, state)
+            steps += 1
+            reward, done, score = game.play_step(moves[policy.act(state)])
+            if done:
+                break
+        scores.append(score)
+    mean_score = float(np.mean(scores))
+    return index, mean_score + SURVIVAL_BONUS * steps / len(seeds), mean_score
+
+
+def select(fitness, n, rng, method='tournament', tournament_size=TOURNAMENT_SIZE, truncation=TRUNCATION):
+    # Indices of n parents
+    if method == 'tournament':
+        entrants = rng.integers(len(fitness), size=(n, tournament_size))
+        return entrants[np.arange(n), fitness[entrants].argmax(1)]
+    if method == 'truncation':
+        top = np.argsort(fitness)[::-1][:max(1, int(len(fitness) * truncation))]
+        return rng.choice(top, size=n)
+    if method == 'roulette':
+        weights = fitness - fitness.min() + 1e-6
+        return rng.choice(len(fitness), size=n, p=weights / weights.sum())
+    raise ValueError(f"unknown selection {method!r}, choose from {SELECTIONS}")
+
+
+def crossover(a, b, rng, method='uniform'):
+    # One child per pair of parent rows
+    if method == 'uniform':
+        return np.where(rng.random(a.shape) < 0.5, a, b)
+    if method == 'one_point':
+        points = rng.integers(1, a.shape[1], size=(len(a), 1))
+        return np.where(np.arange(a.shape[1]) < points, a, b)
+    if method == 'blend':
+        alpha = rng.random((len(a), 1), dtype=np.float32)
+        return alpha * a + (1 - alpha) * b
+    if method == 'none':
+        return a.copy()
+    raise ValueError(f"unknown crossover {method!r}, choose from {CROSSOVERS}")
+
+
+def mutate(genomes, rng, rate=MUTATION_RATE, sigma=MUTATION_SIGMA):
+    mask = rng.random(genomes.shape) < rate
+    genomes += mask * rng.normal(0, sigma, genomes.shape).astype(np.float32)
+    return genomes
+
+
+def next_generation(population, fitness, rng, elite=ELITE, selection='tournament', crossover_method='uniform',
+                    mutation_rate=MUTATION_RATE, mutation_sigma=MUTATION_SIGMA, tournament_size=TOURNAMENT_SIZE,
+                    crossover_rate=CROSSOVER_RATE):
+    order = np.argsort(fitness)[::-1]
+    n_children = len(population) - elite
+    a = population[select(fitness, n_children, rng, selection, tournament_size)]
+    b = population[select(fitness, n_children, rng, selection, tournament_size)]
+    children = crossover(a, b, rng, crossover_method)
+    clones = rng.random(n_children) >= crossover_rate
+    children[clones] = a[clones]
+    children = mutate(children, rng, mutation_rate, mutation_sigma)
+    return np.concatenate([population[order[:elite]], children])
+
+
+def save_generation(directory, generation, population, fitness, rng, config, history, best, keep=KEEP):
+    # One npz per generation written under a temporary name, then published by
+    # rewriting LATEST, as in checkpoint.save_checkpoint
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'gen-{generation:06d}.npz')
+    np.savez(path + '.tmp.npz', population=population, fitness=fitness)
+    os.replace(path + '.tmp.npz', path)
+    atomic_write(os.path.join(directory, f'gen-{generation:06d}.json'),
+                  json.dumps({'generation': generation, 'config': config, 'history': history, 'best': best,
+                              'rng': rng.bit_generator.state}))
+    atomic_write(os.path.join(directory, LATEST), f'gen-{generation:06d}')
+    for old in sorted(glob.glob(os.path.join(directory, 'gen-*.npz')))[:-keep]:
+        os.remove(old)
+        os.remove(old[:-len('.npz')] + '.json')
+
+
+def load_generation(directory):
+    # (generation, population, fitness, state dict) of the latest checkpoint, or None
+    try:
+        with open(os.path.join(directory, LATEST)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    with np.load(os.path.join(directory, name + '.npz')) as data:
+        population, fitness = data['population'], data['fitness']
+    with open(os.path.join(directory, name + '.json')) as f:
+        state = json.load(f)
+    return state['generation'], population, fitness, state
+
+
+def evolve(out_dir=EVOLUTION_DIR, generations=100, population_size=POPULATION, episodes=EPISODES, workers=None,
+           encoder='basic', hidden_size=HIDDEN_SIZE, elite=ELITE, selection='tournament',
+           tournament_size=TOURNAMENT_SIZE, crossover_method='uniform', mutation_rate=MUTATION_RATE,
+           mutation_sigma=MUTATION_SIGMA, crossover_rate=CROSSOVER_RATE, seed=None, resume=True):
+    config = {'population': population_size, 'episodes': episodes, 'encoder': encoder, 'hidden_size': hidden_size,
+              'elite': elite, 'selection': selection, 'tournament_size': tournament_size,
+              'crossover': crossover_method, 'crossover_rate': crossover_rate, 'mutation_rate': mutation_rate,
+              'mutation_sigma': mutation_sigma, 'seed': seed}
+    for name, value in (('population', population_size), ('episodes', episodes), ('workers', workers)):
+        if value is not None and value < 1:
+            raise ValueError(f"{name} must be at least 1, got {value}")
+    input_size = make_encoder(encoder).size
+    shape = (population_size, n_params(input_size, hidden_size))
+    rng = np.random.default_rng(seed)
+    start_generation, history = 0, []
+    best = None  # fitness, score and generation of the genome in best.pth
+
+    saved = load_generation(out_dir) if resume else None
+    if saved is not None:
+        generation, population, fitness, state = saved
+        if population.shape != shape:
+            raise ValueError(f"checkpoint in {out_dir} has population shape {population.shape}, expected {shape}")
+        changed = sorted(k for k in config if k in state['config'] and state['config'][k] != config[k])
+        if changed:
+            raise ValueError(f"checkpoint in {out_dir} was run with different settings: " +
+                             ", ".join(f"{k}={state['config'][k]!r}" for k in changed) +
+                             " (pass them again, or start over with --fresh)")
+        rng.bit_generator.state = state['rng']
+        history = state['history']
+        best = state.get('best')
+        # The saved population was already evaluated: breed from it
+        population = next_generation(population, fitness, rng, elite, selection, crossover_method,
+                                     mutation_rate, mutation_sigma, tournament_size, crossover_rate)
+        start_generation = generation + 1
+        print('Resumed after generation', generation)
+    else:
+        # Initial genomes: Linear_QNet's own initialisation, seeded per candidate
+        torch_seeds = rng.integers(2**63, size=population_size)
+        population = np.empty(shape, dtype=np.float32)
+        for i, s in enumerate(torch_seeds):
+            with torch.random.fork_rng():
+                torch.manual_seed(int(s))
+                population[i] = model_vector(Linear_QNet(input_size, hidden_size, 3))
+
+    shm = shared_memory.SharedMemory(create=True, size=population.nbytes)
+    try:
+        shared = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        with Pool(workers or os.cpu_count(), _init_worker, (shm.name, shape, encoder, hidden_size)) as pool:
+            for generation in range(start_generation, generations):
+                t = time.perf_counter()
+                shared[:] = population
+                # Common random numbers: every candidate plays the same games
+                seeds = [int(s) for s in rng.integers(2**32, size=episodes)]
+                fitness = np.empty(population_size)
+                scores = np.empty(population_size)
+                for index, fit, score in pool.imap_unordered(_evaluate, [(i, seeds) for i in range(population_size)]):
+                    fitness[index] = fit
+                    scores[index] = score
+                best_index = int(fitness.argmax())
+                history.append({'generation': generation, 'best_score': float(scores[best_index]),
+                                'mean_score': float(scores.mean()), 'best_fitness': float(fitness[best_index]),
+                                'seconds': time.perf_counter() - t})
+                print(f"Generation {generation}: best {scores[best_index]:.1f}, mean {scores.mean():.2f}, "
+                      f"{history[-1]['seconds']:.1f}s")
+                # Each generation plays fresh seeds, so best.pth is only
+                # replaced by a genome that beats the best fitness so far
+                if best is None or fitness[best_index] > best['fitness']:
+                    best = {'fitness': float(fitness[best_index]), 'score': float(scores[best_index]),
+                            'generation': generation}
+                    path = os.path.join(out_dir, 'best.pth')
+                    os.makedirs(out_dir, exist_ok=True)
+                    torch.save(vector_model(population[best_index], input_size, hidden_size).state_dict(),
+                               path + '.tmp')
+                    os.replace(path + '.tmp', path)
+                save_generation(out_dir, generation, population, fitness, rng, config, history, best)
+                population = next_generation(population, fitness, rng, elite, selection, crossover_method,
+                                             mutation_rate, mutation_sigma, tournament_size, crossover_rate)
+    finally:
+        shm.close()
+        shm.unlink()
+    return history
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evolve Linear_QNet weights with a genetic algorithm, "
+                                                 "evaluating candidates in parallel")
+    parser.add_argument('--generations', type=int, default=100, help="total, including resumed ones")
+    parser.add_argument('--population', type=int, default=POPULATION)
+    parser.add_argument('--episodes', type=int, default=EPISODES, help="games per candidate")
+    parser.add_argument('--workers', type=int, default=None, help="default: all cores")
+    parser.add_argument('--encoder', default='basic', choices=sorted(ENCODERS))
+    parser.add_argument('--hidden-size', type=int, default=HIDDEN_SIZE)
+    parser.add_argument('--elite', type=int, default=ELITE)
+    parser.add_argument('--selection', default='tournament', choices=SELECTIONS)
+    parser.add_argument('--tournament-size', type=int, default=TOURNAMENT_SIZE)
+    parser.add_argument('--crossover', default='uniform', choices=CROSSOVERS)
+    parser.add_argument('--crossover-rate', type=float, default=CROSSOVER_RATE,
+                        help="fraction of children bred by crossover")
+    parser.add_argument('--mutation-rate', type=float, default=MUTATION_RATE)
+    parser.add_argument('--mutation-sigma', type=float, default=MUTATION_SIGMA)
+    parser.add_argument('--out', default=EVOLUTION_DIR, help="generation checkpoints and best.pth")
+    parser.add_argument('--fresh', action='store_true', help="ignore checkpoints in --out and start over")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.fresh:
+        shutil.rmtree(args.out, ignore_errors=True)
+    try:
+        evolve(args.out, args.generations, args.population, args.episodes, args.workers, args.encoder,
+               args.hidden_size, args.elite, args.selection, args.tournament_size, args.crossover,
+               args.mutation_rate, args.mutation_sigma, args.crossover_rate, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
@@ -1,7 +1,7 @@
 import tkinter as tk
 import random
 from enum import Enum
-from collections import namedtuple
+from collections import namedtuple, deque
 import numpy as np
 import time
 
@@ -26,70 +26,149 @@ class Direction(Enum):
 
 Point = namedtuple('Point', 'x, y')
 
-class SnakeGameAI:
-    def __init__(self, w=WIDTH, h=HEIGHT):
+class TkRenderer:
+    # Optional Tk window that draws a SnakeGameAI; attach it only when the game
+    # should be watched, the simulation itself never touches Tk
+    def __init__(self, w=WIDTH, h=HEIGHT, title="Snake AI", frame_delay=0.0001):
+        from renderer import SnakeCanvas  # renderer imports this module's constants
+
         self.w = w
         self.h = h
-        
+        self.frame_delay = frame_delay
+
         # Create the main window
         self.root = tk.Tk()
-        self.root.title("Snake AI")
+        self.root.title(title)
         self.root.resizable(False, False)
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
-        
+
         # Create canvas for drawing
         self.canvas = tk.Canvas(self.root, width=self.w, height=self.h, bg=BLACK)
         self.canvas.pack()
-        
+        self.snake_canvas = SnakeCanvas(self.canvas)
+
         # Create score label
         self.score_var = tk.StringVar()
         self.score_var.set("Score: 0")
         self.score_label = tk.Label(self.root, textvariable=self.score_var, fg=WHITE, bg=BLACK, font=("Arial", 16))
         self.score_label.place(x=10, y=10)
-        
-        # Initialize game state
-        self.reset()
-        
-        # For controlling game speed
-        self.last_update_time = time.time()
-    
+
     def on_close(self):
         self.root.quit()
         self.root.destroy()
+
+    def draw(self, game):
+        self.score_var.set(f"Score: {game.score}")
+        # Persistent canvas items: only the head/tail segment and the food move
+        self.snake_canvas.draw(game.snake, game.food)
+
+        # Process pending events and repaint
+        self.canvas.update()
+
+        # Control game speed
+        # current_time = time.time()
+        # elapsed = current_time - self.last_update_time
+        # # sleep_time = max(0, (1.0/SPEED) - elapsed)
+        # sleep_time = max(0, (0.01) - elapsed)  # Fixed fast speed (10ms)
+        if self.frame_delay:
+            time.sleep(self.frame_delay)
+
+
+class SnakeGameAI:
+    def __init__(self, w=WIDTH, h=HEIGHT, headless=False, seed=None):
+        self.w = w
+        self.h = h
+
+        # Private food-placement stream (int, SeedSequence or Generator), so
+        # games never share or disturb global RNG state
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+        # Headless games are pure Python; a renderer can be attached later
+        self.renderer = None
+
+        # Initialize game state
+        self.reset()
+
+        if not headless:
+            self.attach_renderer(TkRenderer(self.w, self.h))
+
+    def attach_renderer(self, renderer):
+        self.renderer = renderer
+        self.renderer.draw(self)
+
+    def detach_renderer(self):
+        renderer = self.renderer
+        self.renderer = None
+        return renderer
     
     def reset(self):
         # Init game state
         self.direction = Direction.RIGHT
         
         self.head = Point(self.w/2, self.h/2)
-        self.snake = [
+        self.snake = deque([
             self.head,
             Point(self.head.x-BLOCK_SIZE, self.head.y),
             Point(self.head.x-(2*BLOCK_SIZE), self.head.y)
-        ]
+        ])
+
+        # Occupancy count per grid cell plus an index of the free cells
+        # (list + position table, swap-remove), so collision checks and food
+        # placement cost O(1) regardless of the snake length
+        self.cols = int(self.w // BLOCK_SIZE)
+        self.rows = int(self.h // BLOCK_SIZE)
+        n_cells = self.cols * self.rows
+        self.grid = bytearray(n_cells)
+        self._free_cells = list(range(n_cells))
+        self._free_pos = list(range(n_cells))
+        for pt in self.snake:
+            self._occupy(pt)
         
         self.score = 0
-        self.score_var.set(f"Score: {self.score}")
         self.food = None
         self._place_food()
         self.frame_iteration = 0
+
+    def _cell(self, pt):
+        return int(pt.y // BLOCK_SIZE) * self.cols + int(pt.x // BLOCK_SIZE)
+
+    def _in_bounds(self, pt):
+        return 0 <= pt.x < self.w and 0 <= pt.y < self.h
+
+    def _occupy(self, pt):
+        cell = self._cell(pt)
+        if self.grid[cell] == 0:
+            pos = self._free_pos[cell]
+            last = self._free_cells.pop()
+            if last != cell:
+                self._free_cells[pos] = last
+                self._free_pos[last] = pos
+        self.grid[cell] += 1
+
+    def _vacate(self, pt):
+        cell = self._cell(pt)
+        self.grid[cell] -= 1
+        if self.grid[cell] == 0:
+            self._free_pos[cell] = len(self._free_cells)
+            self._free_cells.append(cell)
     
     def _place_food(self):
-        x = random.randint(0, (self.w-BLOCK_SIZE)//BLOCK_SIZE) * BLOCK_SIZE
-        y = random.randint(0, (self.h-BLOCK_SIZE)//BLOCK_SIZE) * BLOCK_SIZE
-        self.food = Point(x, y)
-        if self.food in self.snake:
-            self._place_food()
+        # False when the board is full and there is nowhere left to put food
+        if not self._free_cells:
+            return False
+        cell = self._free_cells[self.rng.integers(len(self._free_cells))]
+        self.food = Point((cell % self.cols) * BLOCK_SIZE, (cell // self.cols) * BLOCK_SIZE)
+        return True
     
     def play_step(self, action):
         self.frame_iteration += 1
         
-        # Process any pending events
-        self.root.update()
-        
         # Move based on action
         self._move(action)
-        self.snake.insert(0, self.head)
+        self.snake.appendleft(self.head)
+        if self._in_bounds(self.head):
+            self._occupy(self.head)
         
         # Check if game over
         reward = 0
@@ -103,22 +182,15 @@ class SnakeGameAI:
         if self.head.x == self.food.x and self.head.y == self.food.y:
             self.score += 1
             reward = 10
-            self.score_var.set(f"Score: {self.score}")
-            self._place_food()
+            # The snake fills the board: the episode ends as a win, with the
+            # food reward as its terminal reward
+            game_over = not self._place_food()
         else:
-            self.snake.pop()
+            self._vacate(self.snake.pop())
         
         # Update UI
-        self._update_ui()
-        
-        # Control game speed
-        # current_time = time.time()
-        # elapsed = current_time - self.last_update_time
-        # # sleep_time = max(0, (1.0/SPEED) - elapsed)
-        # sleep_time = max(0, (0.01) - elapsed)  # Fixed fast speed (10ms)
-        sleep_time = 0.0001  # Fixed fast speed (10ms)
-        time.sleep(sleep_time)
-        self.last_update_time = time.time()
+        if self.renderer is not None:
+            self.renderer.draw(self)
         
         return reward, game_over, self.score
     
@@ -130,31 +202,15 @@ class SnakeGameAI:
         if pt.x >= self.w or pt.x < 0 or pt.y >= self.h or pt.y < 0:
             return True
         
-        # Hits itself
-        if pt in self.snake[1:]:
+        # Hits itself (the head's own cell does not count)
+        occupied = self.grid[self._cell(pt)]
+        if pt == self.head:
+            occupied -= 1
+        if occupied > 0:
             return True
         
         return False
     
-    def _update_ui(self):
-        self.canvas.delete("all")
-        
-        # Draw snake
-        for pt in self.snake:
-            self.canvas.create_rectangle(
-                pt.x, pt.y, pt.x + BLOCK_SIZE, pt.y + BLOCK_SIZE, 
-                fill=BLUE1, outline="")
-            self.canvas.create_rectangle(
-                pt.x + 4, pt.y + 4, pt.x + BLOCK_SIZE - 4, pt.y + BLOCK_SIZE - 4, 
-                fill=BLUE2, outline="")
-        
-        # Draw food
-        self.canvas.create_rectangle(
-            self.food.x, self.food.y, self.food.x + BLOCK_SIZE, self.food.y + BLOCK_SIZE,
-            fill=RED, outline="")
-        
-        self.canvas.update()
-    
     def _move(self, action):
         # [straight, right, left]
         clock_wise = [Direction.RIGHT, Direction.DOWN, Direction.LEFT, Direction.UP]
@@ -201,4 +257,4 @@ if __name__ == "__main__":
             print(f"Game Over! Final Score: {score}")
             break
     
-    game.root.mainloop()  # Keep window open after game over
+    game.renderer.root.mainloop()  # Keep window open after game over
@@ -0,0 +1,204 @@
+import argparse
+import glob
+import os
+import numpy as np
+
+HISTORY = 1000  # recent steps kept in memory (rewards, Q-values)
+GAME_HISTORY = 10_000  # recent games kept in memory (scores, mean scores)
+WINDOW = 100  # games in the rolling score aggregates
+FLUSH_EVERY = 10_000  # steps per on-disk chunk
+
+# Action index order of the network outputs and action counts, as in SnakeGameAI._move
+ACTIONS = ['straight', 'right', 'left']
+# Columns of the on-disk chunks, in the order the rows are written
+STEP_COLUMNS = ['reward'] + [f'q_{action}' for action in ACTIONS]
+GAME_COLUMNS = ['game', 'score', 'mean_score', 'steps', 'reward']
+
+
+class RingBuffer:
+    # Fixed-capacity numpy ring buffer; memory does not grow with run length
+    def __init__(self, capacity, width=None, dtype=np.float32):
+        shape = (capacity,) if width is None else (capacity, width)
+        self.data = np.zeros(shape, dtype=dtype)
+        self.capacity = capacity
+        self.pos = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, value):
+        self.data[self.pos] = value
+        self.pos = (self.pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def state_dict(self):
+        return {'data': self.data.copy(), 'pos': self.pos, 'size': self.size}
+
+    def load_state_dict(self, state):
+        self.data[:] = state['data']
+        self.pos = state['pos']
+        self.size = state['size']
+
+    def last(self, n=None):
+        # Most recent n entries, oldest first
+        n = self.size if n is None else min(n, self.size)
+        idx = (self.pos - n + np.arange(n)) % self.capacity
+        return self.data[idx]
+
+
+class MetricsStore:
+    # Agent telemetry: bounded recent history, running aggregates and, when
+    # log_dir is set, append-only chunked .npy files for offline replay
+    def __init__(self, log_dir=None, history=HISTORY, game_history=GAME_HISTORY, window=WINDOW,
+                 flush_every=FLUSH_EVERY):
+        self.q_values = RingBuffer(history, 3)
+        self.rewards = RingBuffer(history)
+        self.scores = RingBuffer(game_history)
+        self.mean_scores = RingBuffer(game_history)
+        self.window = window
+
+        # Running aggregates over the whole run
+        self.n_steps = 0
+        self.n_games = 0
+        self.total_score = 0
+        self.total_reward = 0.0
+        self.record = 0
+        self.q_sum = 0.0
+        self.q_count = 0
+        self.q_max = -np.inf
+        self._game_steps = 0
+        self._game_reward = 0.0
+
+        # Pending rows for the next on-disk chunk
+        self.log_dir = log_dir
+        self.flush_every = flush_every
+        self._pending_q = None
+        self._steps = np.zeros((flush_every, len(STEP_COLUMNS)), dtype=np.float32)
+        self._n_steps_pending = 0
+        self._games = []
+        self._chunk = 0
+        if log_dir is not None:
+            os.makedirs(log_dir, exist_ok=True)
+            # Continue numbering after chunks already on disk
+            self._chunk = len(glob.glob(os.path.join(log_dir, 'steps_*.npy')))
+
+    def record_q_values(self, q_values):
+        # Q-values of all actions this step, in ACTIONS order (the step row's
+        # columns after the reward)
+        self.q_values.append(q_values)
+        self._pending_q = q_values
+        self.q_sum += float(np.mean(q_values))
+        self.q_count += 1
+        self.q_max = max(self.q_max, float(np.max(q_values)))
+
+    def record_step(self, reward):
+        self.rewards.append(reward)
+        self.n_steps += 1
+        self.total_reward += reward
+        self._game_steps += 1
+        self._game_reward += reward
+
+        if self.log_dir is not None:
+            row = self._steps[self._n_steps_pending]
+            row[0] = reward
+            row[1:] = np.nan if self._pending_q is None else self._pending_q
+            self._n_steps_pending += 1
+            if self._n_steps_pending == self.flush_every:
+                self.flush()
+        self._pending_q = None
+
+    def record_game(self, score):
+        self.n_games += 1
+        self.total_score += score
+        self.record = max(self.record, score)
+        mean_score = self.total_score / self.n_games
+        self.scores.append(score)
+        self.mean_scores.append(mean_score)
+        if self.log_dir is not None:
+            row = {'game': self.n_games, 'score': score, 'mean_score': mean_score,
+                   'steps': self._game_steps, 'reward': self._game_reward}
+            self._games.append([row[name] for name in GAME_COLUMNS])
+        self._game_steps = 0
+        self._game_reward = 0.0
+
+    def summary(self):
+        recent = self.scores.last(self.window)
+        rewards = self.rewards.last()
+        return {
+            'n_games': self.n_games,
+            'n_steps': self.n_steps,
+            'record': self.record,
+            'mean_score': self.total_score / self.n_games if self.n_games else 0.0,
+            'recent_mean_score': float(recent.mean()) if len(recent) else 0.0,
+            'recent_max_score': float(recent.max()) if len(recent) else 0.0,
+            'reward_rate': float(rewards.mean()) if len(rewards) else 0.0,
+            'q_mean': self.q_sum / self.q_count if self.q_count else 0.0,
+            'q_max': self.q_max if self.q_count else 0.0,
+        }
+
+    # Running aggregates and ring buffers, for checkpoints
+    SCALARS = ['n_steps', 'n_games', 'total_score', 'total_reward', 'record', 'q_sum', 'q_count', 'q_max']
+    RINGS = ['q_values', 'rewards', 'scores', 'mean_scores']
+
+    def state_dict(self):
+        state = {name: getattr(self, name) for name in self.SCALARS}
+        state.update({name: getattr(self, name).state_dict() for name in self.RINGS})
+        return state
+
+    def load_state_dict(self, state):
+        for name in self.SCALARS:
+            setattr(self, name, state[name])
+        for name in self.RINGS:
+            getattr(self, name).load_state_dict(state[name])
+
+    def flush(self):
+        # Write the pending rows as a new chunk; tmp file + rename so a crash
+        # never leaves a truncated chunk behind
+        if self.log_dir is None or (self._n_steps_pending == 0 and not self._games):
+            return
+        steps = self._steps[:self._n_steps_pending]
+        games = np.array(self._games, dtype=np.float64).reshape(-1, len(GAME_COLUMNS))
+        for name, data in (('steps', steps), ('games', games)):
+            path = os.path.join(self.log_dir, f'{name}_{self._chunk:06d}.npy')
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, data)
+            os.replace(tmp, path)
+        self._chunk += 1
+        self._n_steps_pending = 0
+        self._games = []
+
+
+def load_history(log_dir):
+    # Concatenate every flushed chunk: {'steps': (n, 4), 'games': (m, 5)}
+    history = {}
+    for name, columns in (('steps', STEP_COLUMNS), ('games', GAME_COLUMNS)):
+        chunks = [np.load(path) for path in sorted(glob.glob(os.path.join(log_dir, f'{name}_*.npy')))]
+        history[name] = np.concatenate(chunks) if chunks else np.zeros((0, len(columns)))
+    return history
+
+
+if __name__ == '__main__':
+    # Replay the score curves of a finished (or running) training run
+    import matplotlib.pyplot as plt
+
+    parser = argparse.ArgumentParser(description="Plot training curves from a metrics directory")
+    parser.add_argument('log_dir')
+    parser.add_argument('--out', default=None, help="save the figure instead of showing it")
+    args = parser.parse_args()
+
+    games = load_history(args.log_dir)['games']
+    game, score, mean_score = (GAME_COLUMNS.index(name) for name in ('game', 'score', 'mean_score'))
+    print('Games:', len(games), 'Record:', int(games[:, score].max()) if len(games) else 0)
+    plt.title('Score Tracking')
+    plt.xlabel('Games')
+    plt.ylabel('Score')
+    plt.plot(games[:, game], games[:, score], label='Scores')
+    plt.plot(games[:, game], games[:, mean_score], label='Mean Scores')
+    plt.legend()
+    plt.grid(True)
+    if args.out:
+        plt.savefig(args.out)
+    else:
+        plt.show()
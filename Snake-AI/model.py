@@ -3,6 +3,8 @@ import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
 import os
+import copy
+import numpy as np
 
 class Linear_QNet(nn.Module):
     def __init__(self, input_size, hidden_size, output_size):
@@ -25,18 +27,54 @@ class Linear_QNet(nn.Module):
 
 
 class QTrainer:
-    def __init__(self, model, lr, gamma):
+    # Optional target network for the bootstrap term: hard copy every
+    # `target_sync` optimizer steps, or Polyak averaging with rate `tau` after
+    # every step. `double` selects the next action with the online network and
+    # evaluates it with the target network (Double DQN).
+    def __init__(self, model, lr, gamma, target_sync=None, tau=None, double=False):
+        if double and not (target_sync or tau):
+            raise ValueError("Double DQN needs a target network: set target_sync or tau")
         self.lr = lr
         self.gamma = gamma
         self.model = model
         self.optimizer = optim.Adam(model.parameters(), lr=self.lr)
         self.criterion = nn.MSELoss()
+        self.target_sync = target_sync
+        self.tau = tau
+        self.double = double
+        self.n_updates = 0
+        self.target_model = None
+        if target_sync or tau:
+            self.target_model = copy.deepcopy(model)
+            for p in self.target_model.parameters():
+                p.requires_grad_(False)
 
-    def train_step(self, state, action, reward, next_state, done):
-        state = torch.tensor(state, dtype=torch.float)
-        next_state = torch.tensor(next_state, dtype=torch.float)
-        action = torch.tensor(action, dtype=torch.long)
-        reward = torch.tensor(reward, dtype=torch.float)
+    def update_target(self):
+        if self.target_model is None:
+            return
+        with torch.no_grad():
+            if self.tau:
+                for target, online in zip(self.target_model.parameters(), self.model.parameters()):
+                    target.lerp_(online, self.tau)
+            elif self.n_updates % self.target_sync == 0:
+                self.target_model.load_state_dict(self.model.state_dict())
+
+    @staticmethod
+    def _as_tensor(x, dtype):
+        # Pre-built tensors are used as-is, anything else goes through one numpy array
+        if torch.is_tensor(x):
+            return x.to(dtype)
+        return torch.as_tensor(np.asarray(x), dtype=dtype)
+
+    def train_step(self, state, action, reward, next_state, done, weights=None):
+        # Accepts a single transition or a batch; actions are one-hot rows or indices.
+        # Optional per-sample weights (prioritized replay importance sampling)
+        # scale the loss. Returns the TD errors of the batch.
+        state = self._as_tensor(state, torch.float)
+        next_state = self._as_tensor(next_state, torch.float)
+        action = self._as_tensor(action, torch.long)
+        reward = self._as_tensor(reward, torch.float)
+        done = self._as_tensor(done, torch.bool)
         # (n, x)
 
         if len(state.shape) == 1:
@@ -44,28 +82,40 @@ class QTrainer:
             state = torch.unsqueeze(state, 0)
             next_state = torch.unsqueeze(next_state, 0)
             action = torch.unsqueeze(action, 0)
-            reward = torch.unsqueeze(reward, 0)
-            done = (done, )
+            reward = reward.reshape(1)
+            done = done.reshape(1)
+
+        if len(action.shape) == 2:
+            action = torch.argmax(action, dim=1)
 
         # 1: predicted Q values with current state
         pred = self.model(state)
 
-        target = pred.clone()
-        for idx in range(len(done)):
-            Q_new = reward[idx]
-            if not done[idx]:
-                Q_new = reward[idx] + self.gamma * torch.max(self.model(next_state[idx]))
-
-            target[idx][torch.argmax(action[idx]).item()] = Q_new
-    
         # 2: Q_new = r + y * max(next_predicted Q value) -> only do this if not done
-        # pred.clone()
+        # one forward pass over all next states, masked by the done flags
+        with torch.no_grad():
+            if self.target_model is None:
+                next_q = self.model(next_state).max(dim=1).values
+            elif self.double:
+                best = self.model(next_state).argmax(dim=1, keepdim=True)
+                next_q = self.target_model(next_state).gather(1, best).squeeze(1)
+            else:
+                next_q = self.target_model(next_state).max(dim=1).values
+            q_new = reward + self.gamma * next_q * (~done)
+
         # preds[argmax(action)] = Q_new
+        target = pred.detach().clone()
+        target[torch.arange(len(action)), action] = q_new
+
         self.optimizer.zero_grad()
-        loss = self.criterion(target, pred)
+        if weights is None:
+            loss = self.criterion(target, pred)
+        else:
+            weights = self._as_tensor(weights, torch.float)
+            loss = (weights * ((target - pred) ** 2).mean(dim=1)).mean()
         loss.backward()
 
         self.optimizer.step()
-
-
-
+        self.n_updates += 1
+        self.update_target()
+        return q_new - pred.detach()[torch.arange(len(action)), action]
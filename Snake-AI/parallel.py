@@ -0,0 +1,194 @@
+import argparse
+import queue
+import time
+import multiprocessing as mp
+import numpy as np
+import torch
+from game import SnakeGameAI
+from model import Linear_QNet
+from agent_stats import Agent
+from policy import Policy
+from encoders import ENCODERS, make_encoder
+from checkpoint import save_checkpoint, resume_agent, CHECKPOINT_DIR, CHECKPOINT_EVERY
+
+CHUNK_SIZE = 256  # transitions per message from an actor to the learner
+QUEUE_CHUNKS = 64  # bound on chunks in flight, actors block when the learner falls behind
+SYNC_EVERY = 10  # learner updates between weight broadcasts
+TRAIN_EVERY = 1  # learner updates per received chunk
+
+
+def actor(worker_id, shared_model, version, lock, transitions, stop, games, actor_config, seed):
+    # Plays headless games with a local copy of the network and streams
+    # transitions to the learner in fixed-size chunks. Exploration follows the
+    # learner's schedule: epsilon decays with the learner's game count, which
+    # it publishes in `games`, so N actors explore for epsilon_games games in
+    # total and a resumed run carries on where it stopped. `seed` is this
+    # actor's own SeedSequence, split into exploration and food streams.
+    torch.set_num_threads(1)
+    explore_seed, env_seed = seed.spawn(2)
+    rng = np.random.default_rng(explore_seed)
+    encoder = make_encoder(actor_config['encoder'])
+    epsilon_games = actor_config['epsilon_games']
+    with lock:
+        policy = Policy(shared_model)
+        seen = version.value
+    game = SnakeGameAI(headless=True, seed=env_seed)
+
+    state_size = encoder.size
+    states = np.zeros((CHUNK_SIZE, state_size), dtype=encoder.dtype)
+    next_states = np.zeros((CHUNK_SIZE, state_size), dtype=encoder.dtype)
+    actions = np.zeros(CHUNK_SIZE, dtype=np.int8)
+    rewards = np.zeros(CHUNK_SIZE, dtype=np.float32)
+    dones = np.zeros(CHUNK_SIZE, dtype=np.bool_)
+    moves = np.eye(3, dtype=int).tolist()
+    scores = []
+    n = 0
+    # The next state is encoded once, straight into the chunk, and then
+    # copied forward as the following step's current state
+    state = encoder.encode(game, encoder.empty())
+
+    while not stop.is_set():
+        # Same rule as Agent.get_action
+        if rng.integers(0, 201) < epsilon_games - games.value:
+            move = int(rng.integers(0, 3))
+        else:
+            move = int(policy.act(state))
+        reward, done, score = game.play_step(moves[move])
+
+        states[n] = state
+        encoder.encode(game, next_states[n])
+        actions[n] = move
+        rewards[n] = reward
+        dones[n] = done
+
+        if done:
+            game.reset()
+            scores.append(score)
+            encoder.encode(game, state)
+
+            # Pick up the learner's latest weights between games
+            if version.value != seen:
+                with lock:
+                    policy.sync(shared_model)
+                    seen = version.value
+        else:
+            state[:] = next_states[n]
+        n += 1
+
+        if n == CHUNK_SIZE:
+            chunk = (worker_id, states.copy(), actions.copy(), rewards.copy(),
+                     next_states.copy(), dones.copy(), scores)
+            while not stop.is_set():
+                try:
+                    transitions.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            scores = []
+            n = 0
+
+
+def train_parallel(n_workers=4, max_games=None, prioritized=False, encoder='basic',
+                   target_sync=None, tau=None, double=False, checkpoint_dir=CHECKPOINT_DIR,
+                   checkpoint_every=CHECKPOINT_EVERY, resume=False, seed=None, pretrained=None):
+    # The learner runs in this process: it drains actor chunks into one replay
+    # buffer, trains on it and periodically publishes its weights through a
+    # model kept in shared memory
+    learner = resume_agent(checkpoint_dir) if resume else None
+    if learner is None:
+        learner = Agent(prioritized=prioritized, encoder=encoder, target_sync=target_sync, tau=tau, double=double,
+                        seed=seed, pretrained=pretrained)
+    # Actors only need the encoder and their exploration schedule; the network comes from shared_model
+    actor_config = {'encoder': learner.config['encoder'], 'epsilon_games': learner.epsilon_games}
+    shared_model = Linear_QNet(learner.encoder.size, learner.config['hidden_size'], 3)
+    shared_model.load_state_dict(learner.model.state_dict())
+    shared_model.share_memory()
+
+    ctx = mp.get_context()
+    version = ctx.Value('i', 0)
+    games = ctx.Value('i', learner.n_games)  # learner's game count, drives the actors' epsilon
+    lock = ctx.Lock()
+    transitions = ctx.Queue(maxsize=QUEUE_CHUNKS)
+    stop = ctx.Event()
+    worker_seeds = learner.seed_seq.spawn(n_workers)  # after a resume, past the previous run's actor seeds
+    workers = [ctx.Process(target=actor, args=(i, shared_model, version, lock, transitions, stop, games,
+                                               actor_config, worker_seeds[i]), daemon=True)
+               for i in range(n_workers)]
+    for w in workers:
+        w.start()
+
+    n_steps = 0
+    updates = 0
+    start = time.perf_counter()
+    try:
+        while max_games is None or learner.n_games < max_games:
+            try:
+                worker_id, states, actions, rewards, next_states, dones, scores = transitions.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            learner.memory.push_batch(states, actions, rewards, next_states, dones)
+            n_steps += len(rewards)
+
+            for score in scores:
+                learner.n_games += 1
+                if score > learner.metrics.record:
+                    learner.model.save()
+                learner.metrics.record_game(score)
+                print('Game', learner.n_games, 'Score', score, 'Record:', learner.metrics.record,
+                      'Mean:', round(learner.metrics.summary()['recent_mean_score'], 2),
+                      'Steps/s:', round(n_steps / (time.perf_counter() - start)))
+                if checkpoint_every and learner.n_games % checkpoint_every == 0:
+                    save_checkpoint(learner, checkpoint_dir)
+            games.value = learner.n_games
+
+            for _ in range(TRAIN_EVERY):
+                learner.train_long_memory()
+                updates += 1
+                if updates % SYNC_EVERY == 0:
+                    with lock, torch.no_grad():
+                        for shared, local in zip(shared_model.parameters(), learner.model.parameters()):
+                            shared.copy_(local)
+                        version.value += 1
+    finally:
+        stop.set()
+        # Drain so actors blocked on a full queue can exit
+        while any(w.is_alive() for w in workers):
+            try:
+                transitions.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for w in workers:
+            w.join()
+
+    return learner
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the Snake DQN agent with parallel actor processes")
+    parser.add_argument('--workers', type=int, default=mp.cpu_count(),
+                        help="number of actor processes")
+    parser.add_argument('--games', type=int, default=None,
+                        help="stop after this many games across all actors")
+    parser.add_argument('--prioritized', action='store_true',
+                        help="use prioritized experience replay in the learner")
+    parser.add_argument('--encoder', default='basic', choices=sorted(ENCODERS),
+                        help="observation encoder")
+    parser.add_argument('--target-sync', type=int, default=None,
+                        help="bootstrap from a target network copied every n learner updates")
+    parser.add_argument('--tau', type=float, default=None,
+                        help="bootstrap from a Polyak-averaged target network at this rate")
+    parser.add_argument('--double', action='store_true', help="Double DQN targets")
+    parser.add_argument('--pretrained', default=None, help="start from weights written by pretrain.py")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="root seed; the learner and every actor get independent streams from it")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY,
+                        help="games between learner checkpoints (0 disables them)")
+    parser.add_argument('--resume', action='store_true', help="continue from the latest checkpoint")
+    args = parser.parse_args()
+
+    train_parallel(n_workers=args.workers, max_games=args.games, prioritized=args.prioritized,
+                   encoder=args.encoder, target_sync=args.target_sync, tau=args.tau, double=args.double,
+                   checkpoint_dir=args.checkpoint_dir, checkpoint_every=args.checkpoint_every,
+                   resume=args.resume, seed=args.seed,
+                   pretrained=args.pretrained)
@@ -0,0 +1,192 @@
+import argparse
+import time
+from array import array
+from collections import deque
+import numpy as np
+from game import SnakeGameAI, WIDTH, HEIGHT
+from encoders import DIR_INDEX, OFFSETS
+from search import Grid, ALGORITHMS
+from search.algorithms import bfs
+
+# Turn from the current heading to a target heading (clockwise index
+# difference) -> [straight, right, left]; 2 would be a reversal
+TURN_MOVES = {0: [1, 0, 0], 1: [0, 1, 0], 3: [0, 0, 1]}
+RETRY_EVERY = 4  # found best on the default board (mean score ~540 of 768 cells)
+
+
+class PlannerAgent:
+    # Non-learning baseline for the play_step loop: plan a path to the food,
+    # accept it only if the snake can still reach its own tail after eating,
+    # and otherwise chase the tail (or, failing that, move into the largest
+    # free area). An accepted path is followed without replanning until the
+    # food moves or the game is reset (the next cell is rechecked every step),
+    # and a rejected one is retried only every few tail-chasing moves.
+    def __init__(self, algorithm='astar', retry_every=RETRY_EVERY):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm {algorithm!r}, choose from {sorted(ALGORITHMS)}")
+        self.search = ALGORITHMS[algorithm]
+        self.n_games = 0
+        self.plans = 0  # searches to the food
+        self.fallbacks = 0  # moves chosen by tail-chasing / free-area fallback
+        self.retry_every = retry_every  # tail-chasing moves between attempts at a safe food path
+        self._path = deque()
+        self._snake = None
+        self._food = None
+        self._wait = 0
+
+    def get_action(self, game):
+        # The tail stays blocked: the game counts moving into the current tail
+        # cell as a collision (the tail is only removed after the check)
+        grid = Grid.from_game(game)
+        head = grid.point_cell(game.head)
+        food = grid.point_cell(game.food)
+
+        path = self._path
+        same = game.snake is self._snake and food == self._food
+        if not (same and path and grid.manhattan(head, path[0]) == 1 and not grid.blocked[path[0]]):
+            path.clear()
+            # After a rejected plan, chase the tail for a few moves before
+            # searching again (the body has to move before anything changes)
+            self._wait = self._wait - 1 if same else 0
+            if self._wait <= 0:
+                self._snake = game.snake
+                self._food = food
+                self.plans += 1
+                result = self.search(grid, head, food)
+                if result.path is not None and self._safe(game, grid, result.path):
+                    path.extend(result.path[1:])
+                else:
+                    self._wait = self.retry_every
+
+        if path:
+            target = path.popleft()
+        else:
+            self.fallbacks += 1
+            target = self._fallback(game, grid, head)
+        return self._move(game, grid, head, target)
+
+    def _body(self, game, grid):
+        return [grid.point_cell(pt) for pt in game.snake]
+
+    def _safe(self, game, grid, path):
+        # After following `path` and eating, is the new tail reachable from
+        # the new head? Otherwise the snake could be sealed in.
+        body = self._body(game, grid)
+        snake = (path[:0:-1] + body)[:len(body) + 1]
+        return self._reaches_tail(grid, snake)
+
+    def _reaches_tail(self, grid, snake):
+        if len(snake) < 2:
+            return True
+        blocked = bytearray(grid.size)
+        for cell in snake[1:-1]:
+            blocked[cell] = 1
+        return bfs(Grid(grid.cols, grid.rows, blocked), snake[0], snake[-1]).path is not None
+
+    def _fallback(self, game, grid, head):
+        # Chase the tail: among the moves after which the tail is still
+        # reachable, take the one farthest from it by path length (buys the
+        # most time for the body to clear); if none, the largest free area.
+        # Every non-eating move leaves the same body behind (the old tail
+        # moves on), so a single flood from the next tail serves all of them.
+        body = self._body(game, grid)
+        food = grid.point_cell(game.food)
+        blocked = bytearray(grid.size)
+        for cell in body[:-2]:
+            blocked[cell] = 1
+        distance = self._flood(grid, blocked, body[-2]) if len(body) > 2 else None
+        best, best_score = None, None
+        for n in grid.neighbours(head):
+            if n == food:
+                reaches = self._reaches_tail(grid, [n] + body)
+                score = (1, 0) if reaches else (0, self._free_area(grid, n))
+            elif distance is None or distance[n] >= 0:
+                score = (1, 0 if distance is None else distance[n])
+            else:
+                score = (0, self._free_area(grid, n))
+            if best_score is None or score > best_score:
+                best, best_score = n, score
+
+        return best
+
+    def _flood(self, grid, blocked, source):
+        # BFS distances from source over free cells, -1 where unreachable
+        distance = array('i', [-1]) * grid.size
+        distance[source] = 0
+        adjacency = grid.adjacency()
+        frontier = [source]
+        d = 0
+        while frontier:
+            d += 1
+            nxt = []
+            for cell in frontier:
+                for n in adjacency[cell]:
+                    if distance[n] < 0 and not blocked[n]:
+                        distance[n] = d
+                        nxt.append(n)
+            frontier = nxt
+        return distance
+
+    def _free_area(self, grid, start):
+        seen = bytearray(grid.size)
+        seen[start] = 1
+        stack = [start]
+        count = 0
+        while stack:
+            cell = stack.pop()
+            count += 1
+            for n in grid.neighbours(cell):
+                if not seen[n]:
+                    seen[n] = 1
+                    stack.append(n)
+        return count
+
+    def _move(self, game, grid, head, target):
+        # No free neighbour at all: any move loses
+        if target is None:
+            return [1, 0, 0]
+        hx, hy = grid.xy(head)
+        tx, ty = grid.xy(target)
+        heading = OFFSETS.index((tx - hx, ty - hy))
+        return TURN_MOVES.get((heading - DIR_INDEX[game.direction]) % 4, [1, 0, 0])
+
+
+def run_games(n_games, algorithm='astar', w=WIDTH, h=HEIGHT, seed=None, watch=False, retry_every=RETRY_EVERY):
+    # Headless evaluation: per-game scores plus throughput counters
+    agent = PlannerAgent(algorithm, retry_every=retry_every)
+    game = SnakeGameAI(w, h, headless=not watch, seed=seed)
+    scores = []
+    steps = 0
+    decide = 0.0
+    start = time.perf_counter()
+    while agent.n_games < n_games:
+        t = time.perf_counter()
+        final_move = agent.get_action(game)
+        decide += time.perf_counter() - t
+        steps += 1
+        reward, done, score = game.play_step(final_move)
+        if done:
+            game.reset()
+            agent.n_games += 1
+            scores.append(score)
+    elapsed = time.perf_counter() - start
+    return {'games': n_games, 'mean_score': float(np.mean(scores)), 'max_score': int(np.max(scores)),
+            'steps': steps, 'games_per_min': n_games / elapsed * 60, 'us_per_decision': decide / steps * 1e6,
+            'plans': agent.plans, 'fallbacks': agent.fallbacks}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play Snake with the search-based planner")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--algorithm', default='astar', choices=sorted(ALGORITHMS))
+    parser.add_argument('--width', type=int, default=WIDTH, help="board width in pixels")
+    parser.add_argument('--height', type=int, default=HEIGHT, help="board height in pixels")
+    parser.add_argument('--retry-every', type=int, default=RETRY_EVERY,
+                        help="tail-chasing moves between attempts at a safe path to the food")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--watch', action='store_true', help="draw the games in a Tk window")
+    args = parser.parse_args()
+
+    stats = run_games(args.games, args.algorithm, args.width, args.height, args.seed, args.watch, args.retry_every)
+    for name, value in stats.items():
+        print(f'{name}: {round(value, 2) if isinstance(value, float) else value}')
@@ -0,0 +1,142 @@
+import argparse
+import os
+import time
+import numpy as np
+import torch
+from game import SnakeGameAI
+from model import Linear_QNet
+from encoders import ENCODERS, make_encoder
+
+BACKENDS = ['numpy', 'torch', 'torchscript', 'compile']
+
+
+class Policy:
+    # Greedy action selection for a trained Linear_QNet, for serving rather than
+    # training: no autograd, input/hidden buffers allocated once, and act_batch
+    # for many boards in one pass. The 'numpy' backend runs the two Linear layers
+    # as plain matrix products, which beats torch's per-call overhead at batch 1;
+    # the torch backends run under inference_mode, optionally scripted/compiled.
+    def __init__(self, model, backend='numpy'):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}, choose from {BACKENDS}")
+        self.backend = backend
+        self.sync(model)
+
+    def sync(self, model):
+        # (Re)load weights, e.g. after more training of the source model
+        self.input_size = model.linear1.in_features
+        if self.backend == 'numpy':
+            self.w1 = model.linear1.weight.detach().numpy().T.astype(np.float32)
+            self.b1 = model.linear1.bias.detach().numpy().astype(np.float32)
+            self.w2 = model.linear2.weight.detach().numpy().T.astype(np.float32)
+            self.b2 = model.linear2.bias.detach().numpy().astype(np.float32)
+            self._x = np.zeros(self.input_size, dtype=np.float32)
+            self._h = np.zeros(self.w1.shape[1], dtype=np.float32)
+            self._q = np.zeros(self.w2.shape[1], dtype=np.float32)
+        else:
+            if self.backend == 'torchscript':
+                model = torch.jit.script(model)
+            elif self.backend == 'compile':
+                model = torch.compile(model)
+            self.model = model
+            self._x = torch.zeros(self.input_size)
+
+    def load_vector(self, vector):
+        # numpy backend only: use a flat parameter vector, laid out as
+        # torch.nn.utils.parameters_to_vector(model.parameters()), as the
+        # weights. The layers are views into it, nothing is copied.
+        if self.backend != 'numpy':
+            raise ValueError("load_vector needs the numpy backend")
+        hidden, out = len(self.b1), len(self.b2)
+        sizes = [hidden * self.input_size, hidden, out * hidden, out]
+        w1, b1, w2, b2 = np.split(vector, np.cumsum(sizes)[:-1])
+        self.w1 = w1.reshape(hidden, self.input_size).T
+        self.b1 = b1
+        self.w2 = w2.reshape(out, hidden).T
+        self.b2 = b2
+
+    def _forward(self, state):
+        # Numpy path returns the scratch array, overwritten by the next call
+        if self.backend == 'numpy':
+            self._x[:] = state
+            np.dot(self._x, self.w1, out=self._h)
+            self._h += self.b1
+            np.maximum(self._h, 0, out=self._h)
+            np.dot(self._h, self.w2, out=self._q)
+            self._q += self.b2
+            return self._q
+        with torch.inference_mode():
+            self._x.copy_(torch.from_numpy(np.asarray(state, dtype=np.float32)))
+            return self.model(self._x).numpy()
+
+    def q_values(self, state):
+        return self._forward(state).copy()
+
+    def q_values_batch(self, states):
+        states = np.asarray(states, dtype=np.float32)
+        if self.backend == 'numpy':
+            h = states @ self.w1
+            h += self.b1
+            np.maximum(h, 0, out=h)
+            q = h @ self.w2
+            q += self.b2
+            return q
+        with torch.inference_mode():
+            return self.model(torch.from_numpy(states)).numpy()
+
+    def act(self, state):
+        # Action index: 0 straight, 1 right, 2 left
+        return int(np.argmax(self._forward(state)))
+
+    def act_batch(self, states):
+        return np.argmax(self.q_values_batch(states), axis=1)
+
+    @classmethod
+    def load(cls, path=os.path.join('model', 'model.pth'), input_size=11, hidden_size=256, output_size=3,
+             backend='numpy'):
+        model = Linear_QNet(input_size, hidden_size, output_size)
+        model.load_state_dict(torch.load(path, map_location='cpu'))
+        return cls(model, backend=backend)
+
+
+def play(policy, encoder, games=1, headless=False, seed=None):
+    # Run the policy as a live bot and report decision latency
+    game = SnakeGameAI(headless=headless, seed=seed)
+    state = encoder.empty()
+    move = [0, 0, 0]
+    decide = 0.0
+    steps = 0
+    for n in range(1, games + 1):
+        while True:
+            encoder.encode(game, state)
+            start = time.perf_counter()
+            action = policy.act(state)
+            decide += time.perf_counter() - start
+            steps += 1
+            move[:] = [0, 0, 0]
+            move[action] = 1
+            reward, done, score = game.play_step(move)
+            if done:
+                print('Game', n, 'Score', score)
+                game.reset()
+                break
+    print(f"Mean decision latency: {decide / steps * 1e6:.1f} us over {steps} steps")
+    return game
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play Snake with a trained model")
+    parser.add_argument('--model', default=os.path.join('model', 'model.pth'))
+    parser.add_argument('--backend', default='numpy', choices=BACKENDS)
+    parser.add_argument('--encoder', default='basic', choices=sorted(ENCODERS),
+                        help="encoder the model was trained with")
+    parser.add_argument('--hidden-size', type=int, default=256)
+    parser.add_argument('--games', type=int, default=1)
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--seed', type=int, default=None, help="seed the food placement")
+    args = parser.parse_args()
+
+    encoder = make_encoder(args.encoder)
+    policy = Policy.load(args.model, input_size=encoder.size, hidden_size=args.hidden_size,
+                         backend=args.backend)
+    play(policy, encoder, games=args.games, headless=args.headless, seed=args.seed)
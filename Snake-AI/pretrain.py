@@ -0,0 +1,156 @@
+import argparse
+import glob
+import json
+import os
+import time
+from multiprocessing import Pool
+import numpy as np
+import torch
+import torch.nn.functional as F
+from game import SnakeGameAI
+from model import Linear_QNet
+from encoders import ENCODERS, make_encoder
+from planner import PlannerAgent
+from agent_stats import HIDDEN_SIZE
+
+DEMO_DIR = './demos'
+MAX_STEPS = 300  # moves per demonstration game: the food-chasing phase, which the basic
+                 # features can express (late-game tail-chasing cannot be, and swamps the data)
+BATCH_SIZE = 4096
+EPOCHS = 5
+LR = 0.001
+
+
+def _generate_shard(args):
+    # One worker: play planner games and write them as one shard. Binary
+    # encoders (uint8 0/1 features) are stored bit-packed, 8 features a byte.
+    shard, n_games, encoder_name, seed, max_steps, out_dir = args
+    torch.set_num_threads(1)
+    encoder = make_encoder(encoder_name)
+    game = SnakeGameAI(headless=True, seed=seed)
+    agent = PlannerAgent()
+    states, actions, lengths, scores = [], [], [], []
+    state = encoder.empty()
+    for _ in range(n_games):
+        steps = 0
+        while True:
+            encoder.encode(game, state)
+            move = agent.get_action(game)
+            states.append(state.copy())
+            actions.append(move.index(1))
+            steps += 1
+            reward, done, score = game.play_step(move)
+            if done or steps >= max_steps:
+                break
+        lengths.append(steps)
+        scores.append(score)
+        game.reset()
+
+    states = np.array(states, dtype=encoder.dtype)
+    packed = encoder.dtype == np.uint8 and states.max(initial=0) <= 1
+    path = os.path.join(out_dir, f'shard-{shard:04d}.npz')
+    np.savez_compressed(path + '.tmp.npz', states=np.packbits(states, axis=1) if packed else states,
+                        actions=np.array(actions, dtype=np.uint8), lengths=np.array(lengths, dtype=np.int32),
+                        scores=np.array(scores, dtype=np.int32), packed=packed, state_size=encoder.size)
+    os.replace(path + '.tmp.npz', path)
+    return path, len(actions), scores
+
+
+def generate(n_games, out_dir=DEMO_DIR, workers=None, encoder='basic', seed=None, max_steps=MAX_STEPS):
+    # Demonstrations from the search planner, one shard per worker
+    if n_games < 1:
+        raise ValueError(f"need at least one game to generate, got {n_games}")
+    if workers is not None and workers < 1:
+        raise ValueError(f"need at least one worker, got {workers}")
+    workers = workers or os.cpu_count()
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'demos.json'), 'w') as f:
+        json.dump({'encoder': encoder, 'games': n_games, 'max_steps': max_steps, 'seed': seed}, f)
+    games = [n_games // workers + (i < n_games % workers) for i in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    jobs = [(i, games[i], encoder, seeds[i], max_steps, out_dir) for i in range(workers) if games[i]]
+    start = time.perf_counter()
+    with Pool(len(jobs)) as pool:
+        for path, n_steps, scores in pool.imap_unordered(_generate_shard, jobs):
+            print('Wrote', path, n_steps, 'steps, mean score', round(float(np.mean(scores)), 1))
+    print(f'{n_games} games in {time.perf_counter() - start:.1f}s')
+
+
+def load_demos(data_dir):
+    # All shards as (states float32 tensor, actions int64 tensor)
+    states, actions = [], []
+    for path in sorted(glob.glob(os.path.join(data_dir, 'shard-*.npz'))):
+        with np.load(path) as shard:
+            s = shard['states']
+            if shard['packed']:
+                s = np.unpackbits(s, axis=1, count=int(shard['state_size']))
+            states.append(s)
+            actions.append(shard['actions'])
+    if not states:
+        raise FileNotFoundError(f"no demonstration shards in {data_dir}")
+    return (torch.from_numpy(np.concatenate(states).astype(np.float32)),
+            torch.from_numpy(np.concatenate(actions).astype(np.int64)))
+
+
+def pretrain(model, states, actions, epochs=EPOCHS, batch_size=BATCH_SIZE, lr=LR, seed=None):
+    # Behaviour cloning: the Q-values are trained as logits with cross-entropy
+    # against the planner's moves. That fixes which action ranks highest, not
+    # the Q scale, which DQN fine-tuning then calibrates.
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    generator = torch.Generator()
+    if seed is not None:
+        generator.manual_seed(seed)
+    n = len(actions)
+    for epoch in range(1, epochs + 1):
+        order = torch.randperm(n, generator=generator)
+        total_loss = 0.0
+        correct = 0
+        for i in range(0, n, batch_size):
+            idx = order[i:i + batch_size]
+            logits = model(states[idx])
+            loss = F.cross_entropy(logits, actions[idx])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(idx)
+            correct += (logits.argmax(1) == actions[idx]).sum().item()
+        print(f'Epoch {epoch}: loss {total_loss / n:.4f}, accuracy {correct / n:.3f}')
+    return model
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate planner demonstrations and pretrain Linear_QNet on them")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help="play planner games in parallel and store them as shards")
+    gen.add_argument('--games', type=int, default=100)
+    gen.add_argument('--out', default=DEMO_DIR)
+    gen.add_argument('--workers', type=int, default=None, help="default: all cores")
+    gen.add_argument('--encoder', default='basic', choices=sorted(ENCODERS))
+    gen.add_argument('--max-steps', type=int, default=MAX_STEPS, help="moves kept per game")
+    gen.add_argument('--seed', type=int, default=None)
+
+    fit = commands.add_parser('train', help="supervised pretraining on stored demonstrations")
+    fit.add_argument('--data', default=DEMO_DIR)
+    fit.add_argument('--out', default='pretrained.pth', help="file name under ./model")
+    fit.add_argument('--hidden-size', type=int, default=HIDDEN_SIZE)
+    fit.add_argument('--epochs', type=int, default=EPOCHS)
+    fit.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    fit.add_argument('--lr', type=float, default=LR)
+    fit.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        try:
+            generate(args.games, args.out, args.workers, args.encoder, args.seed, args.max_steps)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        states, actions = load_demos(args.data)
+        print('Loaded', len(actions), 'demonstration steps')
+        if args.seed is not None:
+            torch.manual_seed(args.seed)
+        model = Linear_QNet(states.shape[1], args.hidden_size, 3)
+        pretrain(model, states, actions, args.epochs, args.batch_size, args.lr, args.seed)
+        model.save(args.out)
+        print('Saved', os.path.join('model', args.out))
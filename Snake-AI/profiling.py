@@ -0,0 +1,238 @@
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+from collections import defaultdict
+
+PROFILE_EVERY = 10.0  # seconds between snapshots
+CHECK_EVERY = 256  # steps between clock reads for the snapshot timer
+TOP = 25  # entries in the cProfile/tracemalloc reports
+
+
+class _Phase:
+    # Reusable timer for one named phase; accumulates into its profiler
+    __slots__ = ('name', 'totals', 'calls', 'start')
+
+    def __init__(self, name, totals, calls):
+        self.name = name
+        self.totals = totals
+        self.calls = calls
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.totals[self.name] += time.perf_counter() - self.start
+        self.calls[self.name] += 1
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullProfiler:
+    # Stand-in used when profiling is off: every hook returns immediately and
+    # phase() hands out one shared do-nothing context manager
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def count(self, name, n=1):
+        pass
+
+    def step(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    # Per-phase wall-clock timers and counters for the training loops. Every
+    # `every` seconds a snapshot of the interval (time and share per phase,
+    # steps/sec, games/sec, counters and gauges) is appended to `path` as one
+    # JSON line, after a {"run_start": ...} line marking where this run's
+    # snapshots begin. With signals, SIGUSR1 starts/stops a cProfile capture
+    # and SIGUSR2 a tracemalloc one; their reports are written next to `path`.
+    enabled = True
+
+    def __init__(self, path='profile.jsonl', every=PROFILE_EVERY, gauges=None, signals=True):
+        self.path = path
+        self.every = every
+        self.gauges = gauges  # callable returning {name: value}, sampled at each snapshot
+        self.report_dir = os.path.dirname(os.path.abspath(path))
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._phases = {}
+        self._steps = 0
+        self._last_counters = {}
+        self._start = self._last = time.perf_counter()
+        self._cprofile = None
+        with open(path, 'a') as f:
+            f.write(json.dumps({'run_start': time.time(), 'pid': os.getpid()}) + '\n')
+        if signals and hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.toggle_cprofile())
+            signal.signal(signal.SIGUSR2, lambda signum, frame: self.toggle_tracemalloc())
+
+    def phase(self, name):
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(name, self.totals, self.calls)
+        return phase
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def step(self):
+        # One environment step; the clock is only read every CHECK_EVERY steps
+        self.counters['steps'] += 1
+        self._steps += 1
+        if self._steps >= CHECK_EVERY:
+            self._steps = 0
+            if time.perf_counter() - self._last >= self.every:
+                self.dump()
+
+    def snapshot(self):
+        # Interval since the previous snapshot; resets the phase timers
+        now = time.perf_counter()
+        interval = now - self._last
+        counters = dict(self.counters)
+        delta = {k: v - self._last_counters.get(k, 0) for k, v in counters.items()}
+        timed = sum(self.totals.values())
+        snapshot = {
+            'time': time.time(),
+            'elapsed': now - self._start,
+            'interval': interval,
+            'steps_per_sec': delta.get('steps', 0) / interval if interval else None,
+            'games_per_sec': delta.get('games', 0) / interval if interval else None,
+            'phases': {name: {'calls': self.calls[name], 'seconds': total,
+                              'mean_us': total / self.calls[name] * 1e6 if self.calls[name] else None,
+                              'share': total / interval if interval else None}
+                       for name, total in self.totals.items()},
+            'untimed_share': (interval - timed) / interval if interval else None,
+            'counters': counters,
+        }
+        if self.gauges is not None:
+            snapshot['gauges'] = self.gauges()
+        self.totals.clear()
+        self.calls.clear()
+        self._last_counters = counters
+        self._last = now
+        return snapshot
+
+    def dump(self):
+        snapshot = self.snapshot()
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(snapshot) + '\n')
+        return snapshot
+
+    def toggle_cprofile(self):
+        if self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+            print('cProfile capture started')
+            return
+        self._cprofile.disable()
+        path = os.path.join(self.report_dir, f'cprofile-{time.strftime("%Y%m%d-%H%M%S")}.prof')
+        self._cprofile.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(self._cprofile, stream=out).sort_stats('cumulative').print_stats(TOP)
+        with open(path[:-len('.prof')] + '.txt', 'w') as f:
+            f.write(out.getvalue())
+        self._cprofile = None
+        print('cProfile capture written to', path)
+
+    def toggle_tracemalloc(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            print('tracemalloc capture started')
+            return
+        stats = tracemalloc.take_snapshot().statistics('lineno')
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        path = os.path.join(self.report_dir, f'tracemalloc-{time.strftime("%Y%m%d-%H%M%S")}.txt')
+        with open(path, 'w') as f:
+            f.write(f'current {current} bytes, peak {peak} bytes\n')
+            for stat in stats[:TOP]:
+                f.write(f'{stat}\n')
+        print('tracemalloc capture written to', path)
+
+    def close(self):
+        # Final snapshot, and any capture still running is written out
+        if self._cprofile is not None:
+            self.toggle_cprofile()
+        if tracemalloc.is_tracing():
+            self.toggle_tracemalloc()
+        self.dump()
+
+
+def read_runs(path):
+    # Snapshots of a profile file grouped per run (split at run_start lines)
+    runs = []
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if 'run_start' in record:
+                runs.append([])
+            elif runs:
+                runs[-1].append(record)
+            else:
+                runs.append([record])  # file written before run_start markers
+    return runs
+
+
+def summarize(snapshots):
+    # Time per phase over one run's snapshots, slowest first
+    totals = defaultdict(float)
+    calls = defaultdict(int)
+    wall = sum(snapshot['interval'] for snapshot in snapshots)
+    if not wall:
+        print('no snapshots')
+        return
+    for snapshot in snapshots:
+        for name, phase in snapshot['phases'].items():
+            totals[name] += phase['seconds']
+            calls[name] += phase['calls']
+    print(f'{wall:.1f}s profiled')
+    for name in sorted(totals, key=totals.get, reverse=True):
+        print(f'{name:20s} {totals[name]:9.2f}s {totals[name] / wall:6.1%} '
+              f'{totals[name] / calls[name] * 1e6:10.1f} us/call')
+    last = snapshots[-1]
+    print('counters:', last['counters'])
+    if 'gauges' in last:
+        print('gauges:', last['gauges'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summarize a profile.jsonl written by agent_stats.py --profile")
+    parser.add_argument('path', nargs='?', default='profile.jsonl')
+    parser.add_argument('--run', type=int, default=-1, help="which run appended to the file (default: the last)")
+    parser.add_argument('--all', action='store_true', help="summarize every run in the file")
+    args = parser.parse_args()
+    runs = read_runs(args.path)
+    if not runs:
+        parser.exit(message=f'{args.path} holds no runs\n')
+    for i in range(len(runs)) if args.all else [args.run % len(runs)]:
+        print(f'Run {i + 1} of {len(runs)}:')
+        summarize(runs[i])
@@ -0,0 +1,191 @@
+import argparse
+import os
+import numpy as np
+from game import SnakeGameAI, Point, BLOCK_SIZE
+
+# An episode is stored as a handful of small integer arrays:
+#   actions  uint8, one per step (0 straight, 1 right, 2 left)
+#   food     cell index (row * cols + col) of every food placement, uint16
+#            or uint32 when the board has more cells than uint16 can index,
+#            the initial one first, then one per point scored
+#   seed, w, h, score
+# Replaying the actions against a game whose food placement reads from the
+# recorded cells reconstructs every frame exactly, at ~1 byte per step.
+MOVES = np.eye(3, dtype=int).tolist()
+
+
+class EpisodeRecorder:
+    # Collects the current episode of `game` while it is played: call
+    # record() after every play_step and start() after every reset
+    def __init__(self, game, seed=None):
+        self.game = game
+        self.seed = seed
+        self.start()
+
+    def _food_cell(self):
+        return self.game._cell(self.game.food)
+
+    def start(self):
+        self.actions = []
+        self.food = [self._food_cell()]
+        self._score = self.game.score
+
+    def record(self, action):
+        self.actions.append(int(np.argmax(action)))
+        if self.game.score != self._score:
+            self._score = self.game.score
+            # No new food after the point that fills the board
+            if self.game._free_cells:
+                self.food.append(self._food_cell())
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp.npz'
+        food_dtype = np.uint16 if self.game.cols * self.game.rows <= 1 << 16 else np.uint32
+        np.savez_compressed(tmp, actions=np.array(self.actions, dtype=np.uint8),
+                            food=np.array(self.food, dtype=food_dtype),
+                            seed=np.int64(-1 if self.seed is None else self.seed),
+                            w=np.int32(self.game.w), h=np.int32(self.game.h), score=np.int32(self._score))
+        os.replace(tmp, path)
+        return path
+
+
+def load_episode(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+class ReplayGame(SnakeGameAI):
+    # Headless game that places food from a recording instead of at random
+    def __init__(self, episode):
+        self.episode = episode
+        super().__init__(int(episode['w']), int(episode['h']), headless=True)
+
+    def reset(self):
+        self._food_cells = iter(self.episode['food'].tolist())
+        super().reset()
+
+    def _place_food(self):
+        if not self._free_cells:
+            return False
+        cell = next(self._food_cells, None)
+        if cell is not None:
+            self.food = Point((cell % self.cols) * BLOCK_SIZE, (cell // self.cols) * BLOCK_SIZE)
+        return True
+
+
+class EpisodePlayer:
+    # Frame-accurate cursor over a recording. Stepping forward plays one move;
+    # seeking backwards re-simulates from the start, which is only
+    # microseconds per step headless.
+    def __init__(self, episode):
+        self.episode = episode
+        self.actions = episode['actions']
+        self.game = ReplayGame(episode)
+        self.frame = 0
+
+    def __len__(self):
+        return len(self.actions)
+
+    def step(self):
+        if self.frame >= len(self.actions):
+            return False
+        self.game.play_step(MOVES[self.actions[self.frame]])
+        self.frame += 1
+        return True
+
+    def seek(self, frame):
+        frame = max(0, min(frame, len(self.actions)))
+        if frame < self.frame:
+            self.game.reset()
+            self.frame = 0
+        while self.frame < frame:
+            self.step()
+
+
+def verify(episode):
+    # Replay headless and check the recorded score comes out again
+    player = EpisodePlayer(episode)
+    player.seek(len(player))
+    return player.game.score == int(episode['score'])
+
+
+class Viewer:
+    # Tk playback of a recording at any speed (frames per second), drawn
+    # incrementally. Space pauses, Left/Right step, Up/Down change the speed,
+    # and the slider seeks.
+    def __init__(self, episode, speed=30, start=0):
+        import tkinter as tk
+        from renderer import SnakeCanvas
+
+        self.player = EpisodePlayer(episode)
+        self.speed = speed
+        self.paused = False
+        self.root = tk.Tk()
+        self.root.title(f"Snake replay (score {int(episode['score'])})")
+        self.canvas = tk.Canvas(self.root, width=self.player.game.w, height=self.player.game.h, bg="#000000")
+        self.canvas.pack()
+        self.snake_canvas = SnakeCanvas(self.canvas)
+        self.status = tk.StringVar()
+        tk.Label(self.root, textvariable=self.status).pack(fill=tk.X)
+        self.slider = tk.Scale(self.root, from_=0, to=len(self.player), orient=tk.HORIZONTAL,
+                               showvalue=False, command=lambda v: self.seek(int(v)))
+        self.slider.pack(fill=tk.X)
+
+        self.root.bind('<space>', lambda e: self.toggle())
+        self.root.bind('<Right>', lambda e: self.seek(self.player.frame + 1))
+        self.root.bind('<Left>', lambda e: self.seek(self.player.frame - 1))
+        self.root.bind('<Up>', lambda e: self.set_speed(self.speed * 2))
+        self.root.bind('<Down>', lambda e: self.set_speed(self.speed / 2))
+
+        self.player.seek(start)
+        self.draw()
+        self.root.after(0, self.tick)
+
+    def toggle(self):
+        self.paused = not self.paused
+
+    def set_speed(self, speed):
+        self.speed = max(1, speed)
+
+    def seek(self, frame):
+        if frame != self.player.frame:
+            self.player.seek(frame)
+            self.draw()
+
+    def draw(self):
+        game = self.player.game
+        self.snake_canvas.draw(game.snake, game.food)
+        self.status.set(f"Frame {self.player.frame}/{len(self.player)}  Score {game.score}  "
+                        f"Speed {self.speed:g} fps{'  (paused)' if self.paused else ''}")
+        self.slider.set(self.player.frame)
+
+    def tick(self):
+        # Above ~100 fps several moves are played per redraw
+        delay = max(1, int(1000 / self.speed))
+        if not self.paused and self.player.frame < len(self.player):
+            for _ in range(max(1, int(self.speed * delay / 1000))):
+                if not self.player.step():
+                    break
+            self.draw()
+        self.root.after(delay, self.tick)
+
+    def run(self):
+        self.root.mainloop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play back a recorded Snake episode")
+    parser.add_argument('episode', help=".npz file written by EpisodeRecorder")
+    parser.add_argument('--speed', type=float, default=30, help="frames per second")
+    parser.add_argument('--start', type=int, default=0, help="frame to start from")
+    parser.add_argument('--verify', action='store_true',
+                        help="only replay headless and check the recorded score")
+    args = parser.parse_args()
+
+    episode = load_episode(args.episode)
+    if args.verify:
+        ok = verify(episode)
+        print('Steps:', len(episode['actions']), 'Score:', int(episode['score']), 'OK' if ok else 'MISMATCH')
+    else:
+        Viewer(episode, speed=args.speed, start=args.start).run()
@@ -0,0 +1,81 @@
+from collections import deque
+from game import BLOCK_SIZE, RED, BLUE1, BLUE2
+
+
+class SnakeCanvas:
+    # Draws a snake and its food on a Tk canvas with persistent items. Each
+    # body segment owns an (outer, inner) rectangle pair for as long as it
+    # exists: a plain move recycles the tail pair as the new head, growth
+    # creates a single pair, and the food item is moved rather than recreated,
+    # so a frame costs a handful of coords() calls whatever the snake length.
+    # Any other change (new game, seeking in a replay) resyncs every segment,
+    # still reusing the existing items.
+    def __init__(self, canvas, block_size=BLOCK_SIZE):
+        self.canvas = canvas
+        self.block_size = block_size
+        self.items = deque()  # (outer, inner) per segment, head first
+        self.cells = deque()  # positions those items are drawn at
+        self.food_item = None
+
+    def _place(self, item, pt):
+        outer, inner = item
+        b = self.block_size
+        self.canvas.coords(outer, pt[0], pt[1], pt[0] + b, pt[1] + b)
+        self.canvas.coords(inner, pt[0] + 4, pt[1] + 4, pt[0] + b - 4, pt[1] + b - 4)
+
+    def _create(self, pt):
+        b = self.block_size
+        outer = self.canvas.create_rectangle(pt[0], pt[1], pt[0] + b, pt[1] + b, fill=BLUE1, outline="")
+        inner = self.canvas.create_rectangle(pt[0] + 4, pt[1] + 4, pt[0] + b - 4, pt[1] + b - 4,
+                                             fill=BLUE2, outline="")
+        return outer, inner
+
+    def draw(self, snake, food):
+        cells = self.cells
+        n = len(snake)
+        if cells and n > 1 and snake[1] == cells[0]:
+            if n == len(cells) and snake[-1] == cells[-2]:
+                # Moved: the tail pair becomes the head
+                item = self.items.pop()
+                cells.pop()
+                self._place(item, snake[0])
+                self.items.appendleft(item)
+                cells.appendleft(snake[0])
+                self._draw_food(food)
+                return
+            if n == len(cells) + 1 and snake[-1] == cells[-1]:
+                # Grew: one new pair at the head
+                self.items.appendleft(self._create(snake[0]))
+                cells.appendleft(snake[0])
+                self._draw_food(food)
+                return
+        self._resync(snake)
+        self._draw_food(food)
+
+    def _resync(self, snake):
+        items = self.items
+        while len(items) > len(snake):
+            self.canvas.delete(*items.pop())
+        for i, pt in enumerate(snake):
+            if i < len(items):
+                self._place(items[i], pt)
+            else:
+                items.append(self._create(pt))
+        self.cells = deque(snake)
+
+    def _draw_food(self, food):
+        b = self.block_size
+        if self.food_item is None:
+            self.food_item = self.canvas.create_rectangle(food[0], food[1], food[0] + b, food[1] + b,
+                                                          fill=RED, outline="")
+        else:
+            self.canvas.coords(self.food_item, food[0], food[1], food[0] + b, food[1] + b)
+
+    def clear(self):
+        for item in self.items:
+            self.canvas.delete(*item)
+        if self.food_item is not None:
+            self.canvas.delete(self.food_item)
+        self.items.clear()
+        self.cells.clear()
+        self.food_item = None
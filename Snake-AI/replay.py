@@ -0,0 +1,451 @@
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    # Ring buffer over preallocated arrays: one row per transition, the oldest
+    # row is overwritten once the buffer is full. States are stored as uint8
+    # (the features are 0/1) and actions as their index; encoders with
+    # non-binary features pass their own state_dtype.
+    def __init__(self, capacity, state_size, rng=None, state_dtype=np.uint8):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.states = np.zeros((capacity, state_size), dtype=state_dtype)
+        self.next_states = np.zeros((capacity, state_size), dtype=state_dtype)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+        self.pos = 0
+        self.size = 0
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state, action, reward, next_state, done):
+        # action may be a one-hot move ([0, 1, 0]) or an action index
+        i = self.pos
+        self.states[i] = state
+        self.next_states[i] = next_state
+        self.actions[i] = action if np.isscalar(action) else np.argmax(action)
+        self.rewards[i] = reward
+        self.dones[i] = done
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        # Vectorized push of n transitions (action indices), wrapping around the end
+        n = len(rewards)
+        idx = (self.pos + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.next_states[idx] = next_states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.dones[idx] = dones
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        return idx
+
+    def sample(self, batch_size):
+        # Whole buffer while it is smaller than a batch, like the old deque path
+        if self.size <= batch_size:
+            idx = np.arange(self.size)
+        else:
+            idx = self.rng.choice(self.size, batch_size, replace=False)
+        return self.gather(idx)
+
+    FIELDS = ['states', 'actions', 'rewards', 'next_states', 'dones']
+
+    def save(self, directory):
+        # One .npy per field (only the filled rows) plus the ring position, so
+        # load() can memory-map them instead of unpickling Python objects
+        for name in self.FIELDS:
+            np.save(os.path.join(directory, f'replay_{name}.npy'), getattr(self, name)[:self.size])
+        with open(os.path.join(directory, 'replay.json'), 'w') as f:
+            json.dump({'pos': self.pos, 'size': self.size}, f)
+
+    def load(self, directory, mmap=True):
+        with open(os.path.join(directory, 'replay.json')) as f:
+            meta = json.load(f)
+        size = min(meta['size'], self.capacity)
+        for name in self.FIELDS:
+            data = np.load(os.path.join(directory, f'replay_{name}.npy'), mmap_mode='r' if mmap else None)
+            getattr(self, name)[:size] = data[:size]
+        self.size = size
+        self.pos = meta['pos'] % self.capacity
+
+    def gather(self, idx):
+        # One fancy-index gather per field; torch.from_numpy wraps the result without copying
+        return (torch.from_numpy(self.states[idx]),
+                torch.from_numpy(self.actions[idx]),
+                torch.from_numpy(self.rewards[idx]),
+                torch.from_numpy(self.next_states[idx]),
+                torch.from_numpy(self.dones[idx]))
+
+
+class SumTree:
+    # Binary sum tree over `capacity` leaf priorities stored in one flat array
+    # (root at 1, children of i at 2i and 2i+1, leaves from self.leaf0 on).
+    # Updates and proportional lookups walk one root-to-leaf path: O(log n).
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.leaf0 = 1
+        while self.leaf0 < capacity:
+            self.leaf0 *= 2
+        self.tree = np.zeros(2 * self.leaf0, dtype=np.float64)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def get(self, idx):
+        return self.tree[self.leaf0 + np.asarray(idx)]
+
+    def update(self, idx, priority):
+        # Scalar path for the per-step push; sums are recomputed from the
+        # children rather than adjusted by a delta so rounding cannot drift
+        node = self.leaf0 + idx
+        self.tree[node] = priority
+        node //= 2
+        while node >= 1:
+            self.tree[node] = self.tree[2 * node] + self.tree[2 * node + 1]
+            node //= 2
+
+    def update_batch(self, idx, priorities):
+        # Set all leaves, then recompute their ancestors one level at a time
+        nodes = self.leaf0 + np.asarray(idx)
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        # Leaf index for each prefix-sum value, all values descended together
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        while nodes[0] < self.leaf0:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values > left_sum
+            values -= np.where(go_right, left_sum, 0.0)
+            nodes = left + go_right
+        return nodes - self.leaf0
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    # Proportional prioritized replay (Schaul et al.): transitions are sampled
+    # with probability p_i^alpha / sum p^alpha and come back with importance
+    # sampling weights that correct for the non-uniform sampling. New
+    # transitions get the highest priority seen so far.
+    def __init__(self, capacity, state_size, alpha=0.6, beta=0.4, beta_increment=1e-4,
+                 eps=1e-3, rng=None, state_dtype=np.uint8):
+        if eps <= 0:
+            raise ValueError('eps must be positive so no transition gets priority 0')
+        super().__init__(capacity, state_size, rng=rng, state_dtype=state_dtype)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def push(self, state, action, reward, next_state, done):
+        i = super().push(state, action, reward, next_state, done)
+        self.tree.update(i, self.max_priority ** self.alpha)
+        return i
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        idx = super().push_batch(states, actions, rewards, next_states, dones)
+        self.tree.update_batch(idx, np.full(len(idx), self.max_priority ** self.alpha))
+        return idx
+
+    def sample(self, batch_size):
+        # Stratified: one draw from each of batch_size equal slices of the total
+        total = self.tree.total
+        if total <= 0:
+            raise ValueError('cannot sample from an empty prioritized buffer')
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        idx = np.minimum(self.tree.find(values), self.size - 1)
+
+        probs = self.tree.get(idx) / total
+        weights = (self.size * probs) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        return self.gather(idx) + (torch.from_numpy(weights.astype(np.float32)), idx)
+
+    def save(self, directory):
+        super().save(directory)
+        np.save(os.path.join(directory, 'replay_priorities.npy'), self.tree.get(np.arange(self.size)))
+        with open(os.path.join(directory, 'replay_per.json'), 'w') as f:
+            json.dump({'max_priority': self.max_priority, 'beta': self.beta}, f)
+
+    def load(self, directory, mmap=True):
+        super().load(directory, mmap=mmap)
+        priorities = np.load(os.path.join(directory, 'replay_priorities.npy'))[:self.size]
+        priorities = np.maximum(priorities, self.eps ** self.alpha)  # saves from before the eps floor
+        self.tree.update_batch(np.arange(len(priorities)), priorities)
+        with open(os.path.join(directory, 'replay_per.json')) as f:
+            meta = json.load(f)
+        self.max_priority = meta['max_priority']
+        self.beta = meta['beta']
+
+    def update_priorities(self, idx, td_errors):
+        # (|td| + eps) ** alpha: the eps floor keeps every transition sampleable
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.eps
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update_batch(idx, priorities ** self.alpha)
+
+
+SEGMENT_SIZE = 1_000_000  # transitions per on-disk segment
+SEGMENT_CACHE = 2  # decompressed segments kept in memory
+ROTATE_EVERY = 100  # batches between swapping the oldest cached segment for the next one
+
+
+class MemmapReplayBuffer:
+    # Append-only replay storage for more transitions than fit in RAM. Each
+    # segment is a directory of .npy files (one per field) opened with
+    # np.memmap, so only the pages touched by a batch are read and the OS page
+    # cache does the caching. Full segments can be compressed to .npz; those
+    # are decompressed on demand into a small cache evicted in load order.
+    # Batches only draw from compressed segments that are in the cache, and
+    # the cache rotates through them round-robin every ROTATE_EVERY batches,
+    # so a segment is decompressed once per rotation rather than once per
+    # batch and every segment is resident for the same number of batches. Same push/sample interface as ReplayBuffer; nothing is ever
+    # overwritten.
+    FIELDS = ReplayBuffer.FIELDS
+
+    def __init__(self, directory, state_size, segment_size=SEGMENT_SIZE, rng=None, state_dtype=np.uint8,
+                 compress_after=None):
+        self.directory = directory
+        self.state_size = state_size
+        self.segment_size = segment_size
+        self.compress_after = compress_after  # keep this many newest segments uncompressed
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.layout = {
+            'states': (state_dtype, (state_size,)),
+            'actions': (np.int8, ()),
+            'rewards': (np.float32, ()),
+            'next_states': (state_dtype, (state_size,)),
+            'dones': (np.bool_, ()),
+        }
+        self.segments = []
+        self.compressed = []
+        self._cache = OrderedDict()
+        self._batches = 0
+        self._rotation = 0  # round-robin position among the compressed segments
+        self.size = 0
+
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta['segment_size'] != segment_size:
+                raise ValueError(f"{directory} was written with segment_size={meta['segment_size']}")
+            for i, compressed in enumerate(meta['compressed']):
+                self.compressed.append(compressed)
+                self.segments.append(None if compressed else self._open_segment(i, 'r+'))
+            self.size = meta['size']
+
+    def __len__(self):
+        return self.size
+
+    def _segment_dir(self, i):
+        return os.path.join(self.directory, f'seg-{i:06d}')
+
+    def _open_segment(self, i, mode):
+        path = self._segment_dir(i)
+        os.makedirs(path, exist_ok=True)
+        arrays = {}
+        for name, (dtype, shape) in self.layout.items():
+            arrays[name] = np.lib.format.open_memmap(os.path.join(path, f'{name}.npy'), mode=mode,
+                                                     dtype=dtype, shape=(self.segment_size,) + shape)
+        return arrays
+
+    def _writable(self, i):
+        if i < len(self.segments) and self.compressed[i]:
+            # Only after load() rolled back into a compressed segment
+            self._decompress(i)
+        while i >= len(self.segments):
+            self.segments.append(self._open_segment(len(self.segments), 'w+'))
+            self.compressed.append(False)
+            if self.compress_after is not None:
+                self.compress_old(self.compress_after)
+        return self.segments[i]
+
+    def _readable(self, i):
+        if not self.compressed[i]:
+            return self.segments[i]
+        # Hits do not refresh recency: gather visits segments in ascending
+        # order, so LRU would always evict the lower ones
+        if i not in self._cache:
+            if len(self._cache) >= SEGMENT_CACHE:
+                self._cache.popitem(last=False)
+            with np.load(os.path.join(self._segment_dir(i), 'data.npz')) as data:
+                self._cache[i] = {name: data[name] for name in self.FIELDS}
+        return self._cache[i]
+
+    def _rotate(self, compressed):
+        # Load the next compressed segment in round-robin order, evicting the
+        # one loaded longest ago
+        self._readable(int(compressed[self._rotation % len(compressed)]))
+        self._rotation += 1
+
+    def _resident(self, idx):
+        # Move draws that land in compressed segments outside the cache to
+        # uniform rows of the cached ones
+        used = -(-self.size // self.segment_size)  # segments holding rows below size
+        compressed = np.flatnonzero(self.compressed[:used])
+        if not len(compressed):
+            return idx
+        self._batches += 1
+        while len(self._cache) < min(SEGMENT_CACHE, len(compressed)):
+            self._rotate(compressed)
+        if self._batches % ROTATE_EVERY == 0:
+            self._rotate(compressed)
+        seg = idx // self.segment_size
+        moved = np.isin(seg, compressed) & ~np.isin(seg, list(self._cache))
+        n = int(moved.sum())
+        if n:
+            resident = np.array(list(self._cache))
+            # Rows a rolled-back size no longer covers are never drawn
+            rows = np.minimum(self.segment_size, self.size - resident * self.segment_size)
+            pick = self.rng.integers(0, len(resident), size=n)
+            idx[moved] = resident[pick] * self.segment_size + (self.rng.random(n) * rows[pick]).astype(np.int64)
+            idx.sort()
+        return idx
+
+    def push(self, state, action, reward, next_state, done):
+        seg, off = divmod(self.size, self.segment_size)
+        arrays = self._writable(seg)
+        arrays['states'][off] = state
+        arrays['next_states'][off] = next_state
+        arrays['actions'][off] = action if np.isscalar(action) else np.argmax(action)
+        arrays['rewards'][off] = reward
+        arrays['dones'][off] = done
+        self.size += 1
+        return self.size - 1
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        batch = {'states': states, 'actions': actions, 'rewards': rewards,
+                 'next_states': next_states, 'dones': dones}
+        start = self.size
+        n = len(rewards)
+        done_rows = 0
+        while done_rows < n:
+            seg, off = divmod(self.size, self.segment_size)
+            count = min(n - done_rows, self.segment_size - off)
+            arrays = self._writable(seg)
+            for name in self.FIELDS:
+                arrays[name][off:off + count] = batch[name][done_rows:done_rows + count]
+            self.size += count
+            done_rows += count
+        return np.arange(start, self.size)
+
+    def sample(self, batch_size):
+        if self.size <= batch_size:
+            idx = np.arange(self.size)
+        else:
+            # Sorted so each segment is read front to back
+            idx = self._resident(np.sort(self.rng.integers(0, self.size, size=batch_size)))
+        return self.gather(idx)
+
+    def gather(self, idx):
+        out = {name: np.empty((len(idx),) + shape, dtype=dtype) for name, (dtype, shape) in self.layout.items()}
+        seg = idx // self.segment_size
+        off = idx % self.segment_size
+        for i in np.unique(seg):
+            mask = seg == i
+            arrays = self._readable(i)
+            for name in self.FIELDS:
+                out[name][mask] = arrays[name][off[mask]]
+        return tuple(torch.from_numpy(out[name]) for name in self.FIELDS)
+
+    def _decompress(self, i):
+        data = self._readable(i)
+        arrays = self._open_segment(i, 'w+')
+        for name in self.FIELDS:
+            arrays[name][:] = data[name]
+        self._cache.pop(i, None)
+        self.segments[i] = arrays
+        self.compressed[i] = False
+        self._write_meta()
+        os.remove(os.path.join(self._segment_dir(i), 'data.npz'))
+
+    def compress_old(self, keep=1):
+        # Compress every full segment except the newest `keep` ones
+        full = self.size // self.segment_size
+        for i in range(max(0, min(full, len(self.segments) - keep))):
+            if self.compressed[i]:
+                continue
+            arrays = self.segments[i]
+            path = self._segment_dir(i)
+            tmp = os.path.join(path, 'data.tmp.npz')
+            np.savez_compressed(tmp, **{name: np.asarray(arrays[name]) for name in self.FIELDS})
+            os.replace(tmp, os.path.join(path, 'data.npz'))
+            self.segments[i] = None
+            self.compressed[i] = True
+            for name in self.FIELDS:
+                os.remove(os.path.join(path, f'{name}.npy'))
+            self._write_meta()
+
+    def _write_meta(self):
+        tmp = os.path.join(self.directory, 'meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'size': self.size, 'segment_size': self.segment_size,
+                       'compressed': self.compressed}, f)
+        os.replace(tmp, os.path.join(self.directory, 'meta.json'))
+
+    def flush(self):
+        for arrays in self.segments:
+            if arrays is not None:
+                for array in arrays.values():
+                    array.flush()
+        self._write_meta()
+
+    def save(self, directory):
+        # The data already lives on disk: flush it and record how many rows
+        # the checkpoint covers
+        self.flush()
+        with open(os.path.join(directory, 'replay.json'), 'w') as f:
+            json.dump({'directory': os.path.abspath(self.directory), 'size': self.size}, f)
+
+    def load(self, directory, mmap=True):
+        # Rows appended after the checkpoint are dropped (they get overwritten)
+        with open(os.path.join(directory, 'replay.json')) as f:
+            meta = json.load(f)
+        if meta['directory'] != os.path.abspath(self.directory):
+            raise ValueError(f"checkpoint's replay memory is in {meta['directory']}, not {self.directory}")
+        if meta['size'] > self.size:
+            raise ValueError(f"{self.directory} holds {self.size} transitions, the checkpoint covers {meta['size']}")
+        self.size = meta['size']
+
+
+if __name__ == '__main__':
+    # Check that memmap sampling with a rotating segment cache stays uniform:
+    # 5 compressed segments and 1 uncompressed one should each get 1/6 of draws
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        segments, rows = 6, 100
+        memory = MemmapReplayBuffer(directory, 1, segment_size=rows, rng=np.random.default_rng(0),
+                                    compress_after=1)
+        zeros = np.zeros((segments * rows, 1), dtype=np.uint8)
+        memory.push_batch(zeros, np.zeros(segments * rows, dtype=np.int8), np.zeros(segments * rows),
+                          zeros, np.zeros(segments * rows, dtype=np.bool_))
+        counts = np.zeros(segments)
+        for _ in range(ROTATE_EVERY * 5 * 20):
+            idx = memory._resident(np.sort(memory.rng.integers(0, memory.size, size=50)))
+            memory.gather(idx)  # as sample() does, so cache hits are exercised too
+            counts += np.bincount(idx // rows, minlength=segments)
+        shares = counts / counts.sum()
+        print('draw share per segment:', np.round(shares, 3))
+        print('OK' if np.abs(shares - 1 / segments).max() < 0.01 else 'NOT UNIFORM')
@@ -0,0 +1,3 @@
+# Uninformed and informed search over the Snake board (flat cell indices)
+from search.grid import Grid
+from search.algorithms import ALGORITHMS, SearchResult, search, bfs, dfs, ucs, ids, greedy, astar
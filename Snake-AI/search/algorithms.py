@@ -0,0 +1,215 @@
+import heapq
+from array import array
+from collections import namedtuple
+
+# path: cells from start to goal inclusive (None if unreachable)
+# expanded: nodes taken off the frontier; generated: nodes put on it
+# max_frontier: peak frontier length; memory: bytes of the preallocated
+# tables plus 8 bytes per frontier slot at the peak
+SearchResult = namedtuple('SearchResult', 'path, cost, expanded, generated, max_frontier, memory')
+
+ALGORITHMS = {}
+
+
+def algorithm(name):
+    def wrap(fn):
+        ALGORITHMS[name] = fn
+        return fn
+    return wrap
+
+
+def _path(parent, start, goal):
+    path = [goal]
+    while path[-1] != start:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return path
+
+
+def _cost(grid, path):
+    if path is None:
+        return None
+    if grid.cost is None:
+        return len(path) - 1
+    return sum(grid.cost[c] for c in path[1:])
+
+
+def _result(grid, parent, start, goal, found, expanded, generated, max_frontier, table_bytes):
+    path = _path(parent, start, goal) if found else None
+    return SearchResult(path, _cost(grid, path), expanded, generated, max_frontier,
+                        table_bytes + 8 * max_frontier)
+
+
+@algorithm('bfs')
+def bfs(grid, start, goal):
+    # Queue as a preallocated int array with head/tail cursors: every cell is
+    # enqueued at most once (marked when generated)
+    visited = bytearray(grid.blocked)  # blocked cells count as already seen
+    adjacency = grid.adjacency()
+    parent = grid.parents()
+    queue = array('i', bytes(4 * grid.size))
+    queue[0] = start
+    visited[start] = 1
+    head, tail = 0, 1
+    expanded = 0
+    max_frontier = 1
+    found = start == goal
+    while head < tail and not found:
+        cell = queue[head]
+        head += 1
+        expanded += 1
+        for n in adjacency[cell]:
+            if not visited[n]:
+                visited[n] = 1
+                parent[n] = cell
+                queue[tail] = n
+                tail += 1
+                if n == goal:
+                    found = True
+                    break
+        if tail - head > max_frontier:
+            max_frontier = tail - head
+    return _result(grid, parent, start, goal, found, expanded, tail, max_frontier,
+                   len(visited) + 8 * grid.size)
+
+
+@algorithm('dfs')
+def dfs(grid, start, goal):
+    # Marked when pushed, so the stack never holds a cell twice
+    visited = bytearray(grid.blocked)
+    adjacency = grid.adjacency()
+    parent = grid.parents()
+    stack = [start]
+    visited[start] = 1
+    expanded = 0
+    generated = 1
+    max_frontier = 1
+    found = start == goal
+    while stack and not found:
+        cell = stack.pop()
+        expanded += 1
+        for n in adjacency[cell]:
+            if not visited[n]:
+                visited[n] = 1
+                parent[n] = cell
+                stack.append(n)
+                generated += 1
+                if n == goal:
+                    found = True
+                    break
+        max_frontier = max(max_frontier, len(stack))
+    return _result(grid, parent, start, goal, found, expanded, generated, max_frontier,
+                   len(visited) + 4 * grid.size)
+
+
+def _best_first(grid, start, goal, weight_g, weight_h):
+    # Shared UCS / Greedy / A* loop. Frontier entries are single ints,
+    # priority * size + cell, so the heap compares machine-sized ints rather
+    # than tuples; stale entries are skipped when popped.
+    size = grid.size
+    cols = grid.cols
+    cost = grid.cost
+    closed = bytearray(grid.blocked)  # blocked cells are never expanded
+    closed[start] = 0
+    adjacency = grid.adjacency()
+    parent = grid.parents()
+    g = array('i', [-1]) * size
+    g[start] = 0
+    gy, gx = divmod(goal, cols)
+    heap = [weight_h * grid.manhattan(start, goal) * size + start]
+    expanded = 0
+    generated = 1
+    max_frontier = 1
+    found = False
+    while heap:
+        cell = heapq.heappop(heap) % size
+        if closed[cell]:
+            continue
+        closed[cell] = 1
+        expanded += 1
+        if cell == goal:
+            found = True
+            break
+        gc = g[cell]
+        for n in adjacency[cell]:
+            if closed[n]:
+                continue
+            gn = gc + (1 if cost is None else cost[n])
+            if g[n] != -1 and gn >= g[n]:
+                continue
+            g[n] = gn
+            parent[n] = cell
+            priority = weight_g * gn
+            if weight_h:
+                ny, nx = divmod(n, cols)
+                priority += weight_h * (abs(nx - gx) + abs(ny - gy))
+            heapq.heappush(heap, priority * size + n)
+            generated += 1
+        if len(heap) > max_frontier:
+            max_frontier = len(heap)
+    return _result(grid, parent, start, goal, found, expanded, generated, max_frontier,
+                   len(closed) + 8 * size)
+
+
+@algorithm('ucs')
+def ucs(grid, start, goal):
+    return _best_first(grid, start, goal, 1, 0)
+
+
+@algorithm('greedy')
+def greedy(grid, start, goal):
+    return _best_first(grid, start, goal, 0, 1)
+
+
+@algorithm('astar')
+def astar(grid, start, goal):
+    # Manhattan distance is admissible for unit (and >= 1) entry costs
+    return _best_first(grid, start, goal, 1, 1)
+
+
+@algorithm('ids')
+def ids(grid, start, goal, max_depth=None):
+    # Depth-limited DFS with limits 0, 1, 2, ... A cell is re-entered only
+    # when reached at a smaller depth than before in the same iteration, so
+    # each iteration is a graph search rather than an exponential tree walk.
+    size = grid.size
+    max_depth = size if max_depth is None else max_depth
+    adjacency = grid.adjacency()
+    blocked = grid.blocked
+    parent = grid.parents()
+    unseen = array('i', [size]) * size
+    depth = array('i', unseen)
+    expanded = 0
+    generated = 0
+    max_frontier = 0
+    for limit in range(max_depth + 1):
+        depth[:] = unseen
+        depth[start] = 0
+        stack = [start]
+        generated += 1
+        cutoff = False
+        while stack:
+            cell = stack.pop()
+            expanded += 1
+            if cell == goal:
+                return _result(grid, parent, start, goal, True, expanded, generated, max_frontier, 8 * size)
+            d = depth[cell] + 1
+            if d > limit:
+                cutoff = True
+                continue
+            for n in adjacency[cell]:
+                if d < depth[n] and not blocked[n]:
+                    depth[n] = d
+                    parent[n] = cell
+                    stack.append(n)
+                    generated += 1
+            max_frontier = max(max_frontier, len(stack))
+        if not cutoff:
+            break  # whole reachable area explored, goal unreachable
+    return _result(grid, parent, start, goal, False, expanded, generated, max_frontier, 8 * size)
+
+
+def search(grid, start, goal, algorithm='astar'):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, choose from {sorted(ALGORITHMS)}")
+    return ALGORITHMS[algorithm](grid, start, goal)
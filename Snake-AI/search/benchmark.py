@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from search.grid import Grid
+from search.algorithms import ALGORITHMS
+
+# Boards from the game's own 32x24 up to 1000x1000 cells
+SIZES = [(32, 24), (64, 48), (128, 96), (256, 192), (1000, 1000)]
+DENSITY = 0.2  # fraction of blocked cells
+IDS_MAX_CELLS = 64 * 48  # IDS reruns a full search per depth, skip it on larger boards
+
+
+def make_board(cols, rows, density, seed):
+    # Random walls with the start (top-left) and goal (bottom-right) corners
+    # free; resampled until the goal is reachable
+    rng = np.random.default_rng(seed)
+    while True:
+        blocked = rng.random(cols * rows) < density
+        blocked[0] = blocked[-1] = False
+        grid = Grid(cols, rows, bytearray(blocked.astype(np.uint8).tobytes()))
+        if ALGORITHMS['bfs'](grid, 0, grid.size - 1).path is not None:
+            return grid
+
+
+def run(sizes, names, density, repeat, seed, out):
+    for cols, rows in sizes:
+        grid = make_board(cols, rows, density, seed)
+        for name in names:
+            params = {'algorithm': name, 'board': [cols, rows], 'density': density}
+            if name == 'ids' and grid.size > IDS_MAX_CELLS:
+                out.write(json.dumps({'name': 'search', 'params': params, 'skipped': 'board too large'}) + '\n')
+                continue
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = ALGORITHMS[name](grid, 0, grid.size - 1)
+                best = min(best, time.perf_counter() - start)
+            out.write(json.dumps({'name': 'search', 'params': params, 'seconds': best,
+                                  'path_cost': result.cost, 'expanded': result.expanded,
+                                  'generated': result.generated, 'max_frontier': result.max_frontier,
+                                  'memory_bytes': result.memory,
+                                  'expanded_per_sec': result.expanded / best if best else None}) + '\n')
+            out.flush()
+
+
+def parse_size(text):
+    cols, _, rows = text.partition('x')
+    return int(cols), int(rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the search algorithms on random boards; "
+                                                 "writes one JSON object per line")
+    parser.add_argument('algorithms', nargs='*', help="algorithms to run (default: all): " + ", ".join(ALGORITHMS))
+    parser.add_argument('--sizes', default=','.join(f'{c}x{r}' for c, r in SIZES),
+                        help="comma-separated COLSxROWS boards")
+    parser.add_argument('--density', type=float, default=DENSITY)
+    parser.add_argument('--repeat', type=int, default=3, help="timing runs, the best one is reported")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    names = args.algorithms or list(ALGORITHMS)
+    unknown = [name for name in names if name not in ALGORITHMS]
+    if unknown:
+        parser.error("unknown algorithm(s): " + ", ".join(unknown))
+    run([parse_size(s) for s in args.sizes.split(',')], names, args.density, args.repeat, args.seed, sys.stdout)
@@ -0,0 +1,94 @@
+from array import array
+from game import BLOCK_SIZE, Point
+
+ADJACENCY_CACHE_CELLS = 256 * 256  # boards up to this size get a precomputed neighbour table
+_adjacency_cache = {}
+
+
+class _Adjacency:
+    # Neighbour table computed on access, for boards too large to precompute
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.size = cols * rows
+
+    def __getitem__(self, cell):
+        return _neighbours(cell, self.cols, self.size)
+
+
+def _neighbours(cell, cols, size):
+    # In-bounds orthogonal neighbours: right, down, left, up
+    x = cell % cols
+    out = []
+    if x + 1 < cols:
+        out.append(cell + 1)
+    if cell + cols < size:
+        out.append(cell + cols)
+    if x > 0:
+        out.append(cell - 1)
+    if cell >= cols:
+        out.append(cell - cols)
+    return tuple(out)
+
+
+class Grid:
+    # Board as flat cell indices (cell = y * cols + x) over a bytearray of
+    # blocked flags, the same layout as SnakeGameAI.grid, plus an optional
+    # per-cell entry cost for UCS/A* (default 1 everywhere)
+    def __init__(self, cols, rows, blocked=None, cost=None):
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        self.blocked = bytearray(self.size) if blocked is None else blocked
+        self.cost = cost
+
+    @classmethod
+    def from_game(cls, game, free_tail=False):
+        # Snapshot of the game's occupancy grid. With free_tail the current
+        # tail cell counts as free, which is right for cells reached two or
+        # more moves ahead (it has moved away by then unless the snake ate),
+        # but SnakeGameAI treats moving straight into the tail as a collision.
+        blocked = bytearray(game.grid)
+        if free_tail:
+            tail = game._cell(game.snake[-1])
+            if blocked[tail]:
+                blocked[tail] -= 1
+        return cls(game.cols, game.rows, blocked)
+
+    def cell(self, x, y):
+        return y * self.cols + x
+
+    def xy(self, cell):
+        y, x = divmod(cell, self.cols)
+        return x, y
+
+    def point_cell(self, pt):
+        # Game pixel coordinates -> cell index
+        return int(pt.y // BLOCK_SIZE) * self.cols + int(pt.x // BLOCK_SIZE)
+
+    def cell_point(self, cell):
+        y, x = divmod(cell, self.cols)
+        return Point(x * BLOCK_SIZE, y * BLOCK_SIZE)
+
+    def adjacency(self):
+        # cell -> tuple of in-bounds neighbours (blocked or not). Shared by all
+        # grids of the same shape, so the search loops only index a table.
+        key = (self.cols, self.rows)
+        if key not in _adjacency_cache:
+            if self.size > ADJACENCY_CACHE_CELLS:
+                return _Adjacency(self.cols, self.rows)
+            _adjacency_cache[key] = [_neighbours(c, self.cols, self.size) for c in range(self.size)]
+        return _adjacency_cache[key]
+
+    def neighbours(self, cell):
+        # Free orthogonal neighbours: right, down, left, up
+        blocked = self.blocked
+        return [n for n in _neighbours(cell, self.cols, self.size) if not blocked[n]]
+
+    def manhattan(self, cell, goal):
+        y1, x1 = divmod(cell, self.cols)
+        y2, x2 = divmod(goal, self.cols)
+        return abs(x1 - x2) + abs(y1 - y2)
+
+    def parents(self):
+        # Preallocated parent table, -1 = not reached
+        return array('i', [-1]) * self.size
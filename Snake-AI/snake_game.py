@@ -3,6 +3,7 @@ import random
 from enum import Enum
 from collections import namedtuple
 import time
+from renderer import SnakeCanvas
 
 # Define game constants
 BLOCK_SIZE = 20
@@ -37,6 +38,7 @@ class SnakeGameTk:
         # Create canvas for drawing
         self.canvas = tk.Canvas(root, width=self.w, height=self.h, bg=BLACK)
         self.canvas.pack()
+        self.snake_canvas = SnakeCanvas(self.canvas, BLOCK_SIZE)
         
         # Create score label
         self.score_var = tk.StringVar()
@@ -70,6 +72,14 @@ class SnakeGameTk:
         self.place_food()
         self.game_over = False
     
+    def restart(self):
+        # The canvas is no longer cleared every frame, so drop the overlay
+        # explicitly and start the loop again
+        self.root.unbind("<space>")
+        self.canvas.delete("game_over")
+        self.reset_game()
+        self.update()
+    
     def place_food(self):
         x = random.randint(0, (self.w-BLOCK_SIZE)//BLOCK_SIZE) * BLOCK_SIZE
         y = random.randint(0, (self.h-BLOCK_SIZE)//BLOCK_SIZE) * BLOCK_SIZE
@@ -121,21 +131,8 @@ class SnakeGameTk:
         return False
     
     def update_ui(self):
-        self.canvas.delete("all")
-        
-        # Draw snake
-        for pt in self.snake:
-            self.canvas.create_rectangle(
-                pt.x, pt.y, pt.x + BLOCK_SIZE, pt.y + BLOCK_SIZE, 
-                fill=BLUE1, outline="")
-            self.canvas.create_rectangle(
-                pt.x + 4, pt.y + 4, pt.x + BLOCK_SIZE - 4, pt.y + BLOCK_SIZE - 4, 
-                fill=BLUE2, outline="")
-        
-        # Draw food
-        self.canvas.create_rectangle(
-            self.food.x, self.food.y, self.food.x + BLOCK_SIZE, self.food.y + BLOCK_SIZE,
-            fill=RED, outline="")
+        # Persistent canvas items: only the head/tail segment and the food move
+        self.snake_canvas.draw(self.snake, self.food)
     
     def update(self):
         if not self.game_over:
@@ -146,12 +143,12 @@ class SnakeGameTk:
                 self.canvas.create_text(
                     self.w/2, self.h/2, 
                     text=f"Game Over! Score: {self.score}", 
-                    fill=WHITE, font=("Arial", 24))
+                    fill=WHITE, font=("Arial", 24), tags="game_over")
                 self.canvas.create_text(
                     self.w/2, self.h/2 + 40, 
                     text="Press Space to play again", 
-                    fill=WHITE, font=("Arial", 18))
-                self.root.bind("<space>", lambda e: self.reset_game())
+                    fill=WHITE, font=("Arial", 18), tags="game_over")
+                self.root.bind("<space>", lambda e: self.restart())
             else:
                 self.update_ui()
                 self.root.after(SPEED, self.update)
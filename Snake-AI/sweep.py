@@ -0,0 +1,155 @@
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import torch
+from agent_stats import Agent, train_headless, LR, GAMMA, HIDDEN_SIZE, MAX_MEMORY, BATCH_SIZE, EPSILON_GAMES
+from checkpoint import save_checkpoint, resume_agent
+
+# Default search space: Agent keyword -> candidate values
+SPACE = {
+    'lr': [LR / 10, LR / 3, LR, LR * 3],
+    'gamma': [0.8, GAMMA, 0.95, 0.99],
+    'hidden_size': [128, HIDDEN_SIZE, 512],
+    'memory_size': [MAX_MEMORY // 10, MAX_MEMORY],
+    'batch_size': [BATCH_SIZE // 4, BATCH_SIZE, BATCH_SIZE * 4],
+    'epsilon_games': [EPSILON_GAMES // 2, EPSILON_GAMES, EPSILON_GAMES * 2],
+}
+ETA = 3  # successive halving keeps the best 1/ETA of the trials per rung
+RESULT_COLUMNS = ['trial', 'seed', 'games', 'mean_score', 'recent_mean_score', 'record', 'seconds', 'status']
+
+
+def grid_trials(space):
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_trials(space, n, rng):
+    return [{name: values[rng.integers(len(values))] for name, values in sorted(space.items())}
+            for _ in range(n)]
+
+
+def run_trial(trial_dir, params, seed, games):
+    # Train one configuration headless up to `games` games in total, resuming
+    # from the trial's own checkpoint so a later rung (or a restarted sweep)
+    # continues instead of starting over. Runs in a pool worker.
+    torch.set_num_threads(1)
+    os.makedirs(trial_dir, exist_ok=True)
+    os.chdir(trial_dir)  # record-setting models go to <trial_dir>/model/model.pth
+    checkpoint_dir = os.path.join(trial_dir, 'checkpoints')
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        agent = resume_agent(checkpoint_dir) or Agent(**params, seed=seed)
+        if agent.n_games < games:
+            train_headless(agent, max_games=games, checkpoint_every=0)
+            save_checkpoint(agent, checkpoint_dir)
+    summary = agent.metrics.summary()
+    return {'games': agent.n_games, 'mean_score': round(summary['mean_score'], 3),
+            'recent_mean_score': round(summary['recent_mean_score'], 3), 'record': summary['record'],
+            'seconds': round(time.perf_counter() - start, 1)}
+
+
+def write_results(path, trials, results):
+    names = sorted({name for trial in trials for name in trial['params']})
+    tmp = path + '.tmp'
+    with open(tmp, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS[:2] + names + RESULT_COLUMNS[2:])
+        writer.writeheader()
+        for i, trial in enumerate(trials):
+            if i in results:
+                writer.writerow({'trial': i, 'seed': trial['seed'], **trial['params'], **results[i]})
+    os.replace(tmp, path)
+
+
+def sweep(out_dir, trials, games, workers=None, halving=False, min_games=50, eta=ETA):
+    # Runs every trial to `games` games, or with halving: all trials to
+    # min_games, the best 1/eta (by recent mean score) on to min_games * eta,
+    # and so on until `games`. Results are rewritten after every rung.
+    out_dir = os.path.abspath(out_dir)
+    results_path = os.path.join(out_dir, 'results.csv')
+    budget = min(min_games, games) if halving else games
+    alive = list(range(len(trials)))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            futures = {i: pool.submit(run_trial, os.path.join(out_dir, f'trial-{i:04d}'), trials[i]['params'],
+                                      trials[i]['seed'], budget)
+                       for i in alive}
+            for i, future in futures.items():
+                results[i] = {**future.result(), 'status': 'running'}
+            if budget >= games:
+                for i in alive:
+                    results[i]['status'] = 'finished'
+                write_results(results_path, trials, results)
+                break
+
+            ranked = sorted(alive, key=lambda i: results[i]['recent_mean_score'], reverse=True)
+            alive = ranked[:max(1, len(ranked) // eta)]
+            for i in ranked[len(alive):]:
+                results[i]['status'] = f'stopped@{budget}'
+            write_results(results_path, trials, results)
+            print(f'Rung of {budget} games done, {len(alive)} trial(s) continue:',
+                  [(i, results[i]['recent_mean_score']) for i in alive])
+            budget = min(budget * eta, games)
+    return results
+
+
+def parse_space(overrides):
+    # --param lr=0.001,0.0003 replaces the candidate values of one parameter
+    space = dict(SPACE)
+    for item in overrides:
+        name, _, values = item.partition('=')
+        if name not in SPACE:
+            raise ValueError(f"unknown parameter {name!r}, choose from {sorted(SPACE)}")
+        values = values.split(',')
+        try:
+            space[name] = [int(v) for v in values]
+        except ValueError:
+            space[name] = [float(v) for v in values]
+    return space
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep over headless training runs; "
+                                                 "rerun with the same --out to resume it")
+    parser.add_argument('--out', default='sweeps/sweep', help="trial checkpoints, trials.json and results.csv")
+    parser.add_argument('--search', default='random', choices=['grid', 'random'])
+    parser.add_argument('--trials', type=int, default=27, help="configurations to sample (random search)")
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=V1,V2',
+                        help="candidate values for one parameter, " + ", ".join(sorted(SPACE)))
+    parser.add_argument('--games', type=int, default=500, help="games per surviving trial")
+    parser.add_argument('--halving', action='store_true', help="successive halving: stop losing trials early")
+    parser.add_argument('--min-games', type=int, default=50, help="games in the first halving rung")
+    parser.add_argument('--eta', type=int, default=ETA)
+    parser.add_argument('--workers', type=int, default=None, help="parallel trials (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # The trial list is fixed on the first run so a resumed sweep reruns the same trials
+    os.makedirs(args.out, exist_ok=True)
+    trials_path = os.path.join(args.out, 'trials.json')
+    if os.path.exists(trials_path):
+        with open(trials_path) as f:
+            trials = json.load(f)
+        print('Resuming', len(trials), 'trials from', trials_path)
+    else:
+        space = parse_space(args.param)
+        rng = np.random.default_rng(args.seed)
+        configs = grid_trials(space) if args.search == 'grid' else random_trials(space, args.trials, rng)
+        seeds = np.random.SeedSequence(args.seed).generate_state(len(configs)).tolist()
+        # Plain Python numbers, for json and for Agent
+        trials = [{'params': {k: v.item() if hasattr(v, 'item') else v for k, v in params.items()}, 'seed': seed}
+                  for params, seed in zip(configs, seeds)]
+        with open(trials_path, 'w') as f:
+            json.dump(trials, f, indent=1)
+
+    results = sweep(args.out, trials, args.games, workers=args.workers, halving=args.halving,
+                    min_games=args.min_games, eta=args.eta)
+    best = max(results, key=lambda i: (results[i]['status'] == 'finished', results[i]['recent_mean_score']))
+    print('Best trial:', best, trials[best]['params'], results[best])
+    print('Results in', os.path.join(args.out, 'results.csv'))
@@ -0,0 +1,159 @@
+import time
+import numpy as np
+from game import BLOCK_SIZE, WIDTH, HEIGHT
+
+# Directions in clockwise order, same as game.SnakeGameAI._move: right, down, left, up
+DX = np.array([1, 0, -1, 0])
+DY = np.array([0, 1, 0, -1])
+# Action index -> direction change: [straight, right, left]
+TURN = np.array([0, 1, -1])
+# Random probes per board before falling back to scanning the free cells
+FOOD_TRIES = 4
+
+
+class VectorSnakeEnv:
+    # N independent Snake boards stepped together. Positions are grid cells
+    # (not pixels) stored as flat indices y * cols + x. Each board keeps an
+    # occupancy grid and a ring buffer of body cells (oldest = tail).
+    def __init__(self, n, w=WIDTH, h=HEIGHT, seed=None):
+        self.n = n
+        self.cols = w // BLOCK_SIZE
+        self.rows = h // BLOCK_SIZE
+        self.cells = self.rows * self.cols
+        self.rng = np.random.default_rng(seed)
+
+        self.grid = np.zeros((n, self.rows, self.cols), dtype=np.uint8)
+        self._flat = self.grid.reshape(n, self.cells)  # view on self.grid
+        self.body = np.zeros((n, self.cells), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.head_x = np.zeros(n, dtype=np.int64)
+        self.head_y = np.zeros(n, dtype=np.int64)
+        self.direction = np.zeros(n, dtype=np.int64)
+        self.food = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.frame_iteration = np.zeros(n, dtype=np.int64)
+        self._boards = np.arange(n)
+
+        self.reset()
+
+    def reset(self, idx=None):
+        if idx is None:
+            idx = self._boards
+        if len(idx) == 0:
+            return self.get_state()
+
+        # Same start as SnakeGameAI.reset: length 3 in the middle, heading right
+        x = self.cols // 2
+        y = self.rows // 2
+        self._flat[idx] = 0
+        for i, dx in enumerate((-2, -1, 0)):
+            cell = y * self.cols + x + dx
+            self.body[idx, i] = cell
+            self._flat[idx, cell] = 1
+        self.head_ptr[idx] = 2
+        self.length[idx] = 3
+        self.head_x[idx] = x
+        self.head_y[idx] = y
+        self.direction[idx] = 0
+        self.score[idx] = 0
+        self.frame_iteration[idx] = 0
+        self._place_food(idx)
+        return self.get_state()
+
+    def _place_food(self, idx):
+        # Returns the boards with no free cell left (the snake fills the board)
+        pending = idx
+        for _ in range(FOOD_TRIES):
+            cand = self.rng.integers(0, self.cells, size=len(pending))
+            ok = self._flat[pending, cand] == 0
+            self.food[pending[ok]] = cand[ok]
+            pending = pending[~ok]
+            if len(pending) == 0:
+                return pending
+
+        # Crowded boards: pick uniformly among the free cells
+        free = self._flat[pending] == 0
+        has_free = free.any(axis=1)
+        self.food[pending[has_free]] = np.argmax(free[has_free] * self.rng.random(free[has_free].shape), axis=1)
+        return pending[~has_free]
+
+    def step(self, actions):
+        # actions: (n,) action indices or (n, 3) one-hot [straight, right, left]
+        actions = np.asarray(actions)
+        if actions.ndim == 2:
+            actions = actions.argmax(axis=1)
+
+        self.frame_iteration += 1
+        self.direction = (self.direction + TURN[actions]) % 4
+        hx = self.head_x + DX[self.direction]
+        hy = self.head_y + DY[self.direction]
+
+        # Collisions are checked before the tail moves, like SnakeGameAI.play_step
+        out = (hx < 0) | (hx >= self.cols) | (hy < 0) | (hy >= self.rows)
+        cell = np.where(out, 0, hy * self.cols + hx)
+        hit = out | (self._flat[self._boards, cell] != 0)
+        dones = hit | (self.frame_iteration > 100 * (self.length + 1))
+        eat = ~dones & (cell == self.food)
+        rewards = np.where(dones, -10.0, np.where(eat, 10.0, 0.0)).astype(np.float32)
+
+        # Advance the head of every live board
+        alive = np.flatnonzero(~dones)
+        self.head_ptr[alive] = (self.head_ptr[alive] + 1) % self.cells
+        self.body[alive, self.head_ptr[alive]] = cell[alive]
+        self._flat[alive, cell[alive]] = 1
+        self.head_x[alive] = hx[alive]
+        self.head_y[alive] = hy[alive]
+        self.length[alive] += 1
+
+        # Drop the tail unless the board just ate
+        moved = np.flatnonzero(~dones & ~eat)
+        tail_ptr = (self.head_ptr[moved] - self.length[moved] + 1) % self.cells
+        self._flat[moved, self.body[moved, tail_ptr]] = 0
+        self.length[moved] -= 1
+
+        ate = np.flatnonzero(eat)
+        self.score[ate] += 1
+        # A full board ends as a win, with the food reward as terminal reward
+        dones[self._place_food(ate)] = True
+
+        scores = self.score.copy()
+        self.reset(np.flatnonzero(dones))
+        return self.get_state(), rewards, dones, scores
+
+    def _collision(self, x, y):
+        out = (x < 0) | (x >= self.cols) | (y < 0) | (y >= self.rows)
+        cell = np.where(out, 0, y * self.cols + x)
+        return out | (self._flat[self._boards, cell] != 0)
+
+    def get_state(self, out=None):
+        # The 11 features of Agent.get_state for every board: danger straight,
+        # right, left, direction l/r/u/d, food l/r/u/d
+        if out is None:
+            out = np.empty((self.n, 11), dtype=int)
+        d = self.direction
+        for i, turn in enumerate(TURN):
+            nd = (d + turn) % 4
+            out[:, i] = self._collision(self.head_x + DX[nd], self.head_y + DY[nd])
+        out[:, 3] = d == 2
+        out[:, 4] = d == 0
+        out[:, 5] = d == 3
+        out[:, 6] = d == 1
+        food_x = self.food % self.cols
+        food_y = self.food // self.cols
+        out[:, 7] = food_x < self.head_x
+        out[:, 8] = food_x > self.head_x
+        out[:, 9] = food_y < self.head_y
+        out[:, 10] = food_y > self.head_y
+        return out
+
+
+if __name__ == "__main__":
+    # Throughput check with random actions
+    env = VectorSnakeEnv(1024)
+    steps = 200
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step(env.rng.integers(0, 3, size=env.n))
+    elapsed = time.perf_counter() - start
+    print(f"{env.n * steps / elapsed:,.0f} env steps/sec over {env.n} boards")